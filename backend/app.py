@@ -4,6 +4,7 @@ Handles API routing, MongoDB connection, and SocketIO events.
 """
 from flask import Flask, jsonify
 from pymongo import MongoClient
+from pymongo.errors import PyMongoError
 import os
 from flask_cors import CORS
 from flask_socketio import SocketIO, emit
@@ -15,8 +16,12 @@ from backend.routes.foods import bp as foods_bp
 from backend.routes.video import bp as video_bp
 from backend.routes.reports import bp as reports_bp
 from backend.socketio_instance import socketio
+from backend.services import order_export, table_sessions
+from backend.utils.serialization import FastJSONProvider
 
 app = Flask(__name__)
+# Faster JSON encoding for large list responses (orjson with stdlib fallback)
+app.json = FastJSONProvider(app)
 CORS(app)
 socketio.init_app(app)
 
@@ -32,6 +37,17 @@ app.register_blueprint(foods_bp)
 app.register_blueprint(video_bp)
 app.register_blueprint(reports_bp)
 
+def create_indexes():
+    """
+    Create the MongoDB indexes used by the services. Run once at startup;
+    logs a warning instead of failing if MongoDB is unreachable.
+    """
+    try:
+        table_sessions.ensure_indexes()
+        order_export.ensure_indexes()
+    except PyMongoError as e:
+        print(f'WARNING: could not create MongoDB indexes: {e}')
+
 @app.route('/')
 def home():
     """Health check endpoint for backend status."""
@@ -50,5 +66,6 @@ def handle_order_update(data):
     emit('order_update', data, broadcast=True)
 
 if __name__ == '__main__':
+    create_indexes()
     # Run the Flask app with SocketIO support
     socketio.run(app, debug=True) 
\ No newline at end of file
@@ -0,0 +1,377 @@
+"""
+Dinner-rush load test for the GastroVision REST/Socket.IO backend.
+
+Simulates a configurable restaurant against the Flask app in-process:
+tables cycle through /tables/update_status, guests order via /orders and
+/api/camera/food_detected, and managers poll /api/reports/summary and
+/orders?table_id=. Reports throughput, tail latency and MongoDB operation
+counts per endpoint.
+
+Runs against a local mongod (MONGO_URI) or, with --mongomock, against an
+in-memory Mongo stand-in (pip install mongomock).
+
+Usage:
+    python -m backend.benchmarks.dinner_rush --mongomock --tables 20 --duration 30
+    MONGO_URI=mongodb://localhost:27017 python -m backend.benchmarks.dinner_rush
+"""
+import argparse
+import collections
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+
+# Collection methods that hit the database and are counted per endpoint
+DB_OPERATIONS = {
+    'find', 'find_one', 'find_one_and_update', 'insert_one', 'insert_many',
+    'update_one', 'update_many', 'replace_one', 'delete_one', 'delete_many',
+    'count_documents', 'estimated_document_count', 'distinct', 'aggregate', 'bulk_write'
+}
+
+_current = threading.local()
+
+
+def current_endpoint():
+    """Return the endpoint label of the request running on this thread."""
+    return getattr(_current, 'endpoint', 'background')
+
+
+class EndpointStats:
+    """
+    Thread-safe collector for request latencies and DB operation counts.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = collections.defaultdict(list)
+        self.errors = collections.Counter()
+        self.db_ops = collections.defaultdict(collections.Counter)
+
+    def record_request(self, endpoint, seconds, status):
+        with self.lock:
+            self.latencies[endpoint].append(seconds)
+            if status >= 400:
+                self.errors[endpoint] += 1
+
+    def record_db_op(self, collection, operation):
+        with self.lock:
+            self.db_ops[current_endpoint()][f'{collection}.{operation}'] += 1
+
+    def reset(self):
+        with self.lock:
+            self.latencies.clear()
+            self.errors.clear()
+            self.db_ops.clear()
+
+
+class CountingCollection:
+    """
+    Proxy around a pymongo/mongomock collection that counts DB operations.
+    """
+    def __init__(self, collection, stats):
+        self._collection = collection
+        self._stats = stats
+
+    def __getattr__(self, name):
+        attr = getattr(self._collection, name)
+        if name not in DB_OPERATIONS:
+            return attr
+        def counted(*args, **kwargs):
+            self._stats.record_db_op(self._collection.name, name)
+            return attr(*args, **kwargs)
+        return counted
+
+
+class CountingDatabase:
+    """
+    Proxy around a database that hands out counting collections.
+    """
+    def __init__(self, database, stats):
+        self._database = database
+        self._stats = stats
+
+    def __getitem__(self, name):
+        return CountingCollection(self._database[name], self._stats)
+
+    def __getattr__(self, name):
+        return getattr(self._database, name)
+
+
+def use_mongomock():
+    """
+    Replace pymongo.MongoClient with one shared in-memory mongomock client.
+    Must run before the backend modules are imported.
+    """
+    import mongomock
+    import pymongo
+    shared_client = mongomock.MongoClient()
+    pymongo.MongoClient = lambda *args, **kwargs: shared_client
+    mongomock.Collection.bulk_write = _mongomock_bulk_write(mongomock.Collection.bulk_write)
+
+
+def _mongomock_bulk_write(original):
+    """
+    mongomock's bulk_write cannot take UpdateOne from current pymongo releases
+    (it rejects the `sort` argument), so apply batches of UpdateOne one by one.
+    """
+    import pymongo
+    def bulk_write(self, requests, ordered=True, **kwargs):
+        requests = list(requests)
+        if not all(isinstance(op, pymongo.UpdateOne) for op in requests):
+            return original(self, requests, ordered=ordered, **kwargs)
+        for op in requests:
+            self.update_one(op._filter, op._doc, upsert=op._upsert)
+    return bulk_write
+
+
+def instrument_backend(stats):
+    """
+    Wrap the module-level `db` and `*_collection` globals of every loaded
+    backend module so their operations are counted per endpoint.
+    """
+    import pymongo.collection
+    import pymongo.database
+    database_types = [pymongo.database.Database]
+    collection_types = [pymongo.collection.Collection]
+    if 'mongomock' in sys.modules:
+        import mongomock
+        database_types.append(mongomock.Database)
+        collection_types.append(mongomock.Collection)
+    for name, module in list(sys.modules.items()):
+        if not name.startswith('backend.') or name.startswith('backend.benchmarks'):
+            continue
+        for attr, value in list(vars(module).items()):
+            if isinstance(value, tuple(database_types)):
+                setattr(module, attr, CountingDatabase(value, stats))
+            elif isinstance(value, tuple(collection_types)):
+                setattr(module, attr, CountingCollection(value, stats))
+    # The waiter scoreboard keeps its own reference for seeding and checkpoints
+    scoring = sys.modules.get('backend.services.waiter_scoring')
+    if scoring is not None and isinstance(scoring.scoreboard.collection, tuple(collection_types)):
+        scoring.scoreboard.collection = CountingCollection(scoring.scoreboard.collection, stats)
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+class Restaurant:
+    """
+    Drives the simulated restaurant against a Flask test client per actor.
+    """
+    def __init__(self, app, stats, args):
+        self.app = app
+        self.stats = stats
+        self.args = args
+        self.stop = threading.Event()
+        self.table_ids = [f'T{i + 1}' for i in range(args.tables)]
+        self.waiter_ids = [f'W{i + 1}' for i in range(args.waiters)]
+        self.food_ids = []
+
+    def call(self, client, method, path, endpoint=None, **kwargs):
+        """Issue one request and record its latency under `endpoint`."""
+        endpoint = endpoint or f'{method} {path.split("?")[0]}'
+        _current.endpoint = endpoint
+        start = time.perf_counter()
+        response = client.open(path, method=method, **kwargs)
+        elapsed = time.perf_counter() - start
+        _current.endpoint = 'background'
+        self.stats.record_request(endpoint, elapsed, response.status_code)
+        return response
+
+    def seed(self, food_names):
+        """Create waiters, foods and tables through the public API."""
+        client = self.app.test_client()
+        for waiter_id in self.waiter_ids:
+            self.call(client, 'POST', '/waiters', json={'waiter_id': waiter_id, 'name': waiter_id, 'code': waiter_id})
+        for i, name in enumerate(food_names[:self.args.foods]):
+            self.call(client, 'POST', '/foods', json={'food_id': name, 'name': name, 'category': 'bench', 'price': 50 + 10 * (i % 10)})
+            self.food_ids.append(name)
+        for i, table_id in enumerate(self.table_ids):
+            waiter_id = self.waiter_ids[i % len(self.waiter_ids)]
+            self.call(client, 'POST', '/tables', json={'table_id': table_id, 'waiter_id': waiter_id, 'status': 'empty'})
+
+    def pause(self, rng, mean):
+        """Sleep for an exponentially distributed think time."""
+        if mean > 0:
+            self.stop.wait(rng.expovariate(1.0 / mean))
+
+    def table_actor(self, index):
+        """One table seating guests, ordering and being cleared in a loop."""
+        rng = random.Random(self.args.seed + index)
+        client = self.app.test_client()
+        table_id = self.table_ids[index]
+        think = self.args.think_time
+        while not self.stop.is_set():
+            self.call(client, 'POST', '/tables/update_status', json={'table_id': table_id, 'status': 'occupied'})
+            for _ in range(rng.randint(1, self.args.max_orders)):
+                if self.stop.is_set():
+                    return
+                self.pause(rng, think)
+                payload = {
+                    'table_id': table_id,
+                    'food_id': rng.choice(self.food_ids),
+                    'quantity': rng.randint(1, 3),
+                    'waiter_id': self.waiter_ids[index % len(self.waiter_ids)]
+                }
+                if rng.random() < self.args.camera_ratio:
+                    self.call(client, 'POST', '/api/camera/food_detected', json=payload)
+                else:
+                    self.call(client, 'POST', '/orders', json=payload)
+                if rng.random() < 0.5:
+                    self.call(client, 'POST', '/tables/update_status', json={'table_id': table_id, 'status': 'served'})
+            self.pause(rng, think)
+            self.call(client, 'POST', '/tables/update_status', json={'table_id': table_id, 'status': 'needs_cleaning'})
+            self.pause(rng, think)
+            self.call(client, 'POST', '/tables/update_status', json={'table_id': table_id, 'status': 'empty'})
+
+    def poll(self, client, path, etags):
+        """GET `path`, revalidating with the last ETag seen unless disabled."""
+        headers = {}
+        if self.args.conditional and path in etags:
+            headers['If-None-Match'] = etags[path]
+        response = self.call(client, 'GET', path, headers=headers)
+        if response.headers.get('ETag'):
+            etags[path] = response.headers['ETag']
+        return response
+
+    def manager_actor(self, index):
+        """One manager screen polling reports and table orders."""
+        rng = random.Random(self.args.seed + 10000 + index)
+        client = self.app.test_client()
+        etags = {}
+        while not self.stop.is_set():
+            self.poll(client, '/api/reports/summary', etags)
+            table_id = rng.choice(self.table_ids)
+            self.poll(client, f'/orders?table_id={table_id}', etags)
+            self.poll(client, '/api/waiters/leaderboard', etags)
+            for path in ('/tables', '/waiters', '/foods'):
+                self.poll(client, path, etags)
+            self.stop.wait(self.args.poll_interval)
+
+    def run(self):
+        """Run all actors for the configured duration; return elapsed seconds."""
+        threads = [threading.Thread(target=self.table_actor, args=(i,), daemon=True) for i in range(len(self.table_ids))]
+        threads += [threading.Thread(target=self.manager_actor, args=(i,), daemon=True) for i in range(self.args.managers)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        self.stop.wait(self.args.duration)
+        self.stop.set()
+        for thread in threads:
+            thread.join()
+        return time.perf_counter() - start
+
+
+def build_report(stats, elapsed, socket_events):
+    """Summarize collected stats into a JSON-serializable dict."""
+    endpoints = {}
+    with stats.lock:
+        for endpoint, latencies in sorted(stats.latencies.items()):
+            values = sorted(latencies)
+            count = len(values)
+            ops = stats.db_ops.get(endpoint, collections.Counter())
+            endpoints[endpoint] = {
+                'requests': count,
+                'errors': stats.errors[endpoint],
+                'throughput_rps': count / elapsed if elapsed else 0.0,
+                'p50_ms': percentile(values, 50) * 1000,
+                'p95_ms': percentile(values, 95) * 1000,
+                'p99_ms': percentile(values, 99) * 1000,
+                'max_ms': values[-1] * 1000 if values else 0.0,
+                'db_ops_per_request': sum(ops.values()) / count if count else 0.0,
+                'db_ops': dict(ops)
+            }
+        background_ops = dict(stats.db_ops.get('background', {}))
+    total = sum(e['requests'] for e in endpoints.values())
+    return {
+        'elapsed_s': elapsed,
+        'total_requests': total,
+        'total_throughput_rps': total / elapsed if elapsed else 0.0,
+        'socketio_events': socket_events,
+        'background_db_ops': background_ops,
+        'endpoints': endpoints
+    }
+
+
+def print_report(report):
+    """Print the report as a fixed-width table."""
+    header = f"{'endpoint':<34}{'reqs':>7}{'err':>5}{'rps':>9}{'p50ms':>9}{'p95ms':>9}{'p99ms':>9}{'maxms':>9}{'db/req':>8}"
+    print(header)
+    print('-' * len(header))
+    for endpoint, e in report['endpoints'].items():
+        print(f"{endpoint:<34}{e['requests']:>7}{e['errors']:>5}{e['throughput_rps']:>9.1f}"
+              f"{e['p50_ms']:>9.2f}{e['p95_ms']:>9.2f}{e['p99_ms']:>9.2f}{e['max_ms']:>9.2f}{e['db_ops_per_request']:>8.2f}")
+    print('-' * len(header))
+    print(f"total: {report['total_requests']} requests in {report['elapsed_s']:.1f}s "
+          f"({report['total_throughput_rps']:.1f} req/s), socket.io events: {report['socketio_events']}")
+    for endpoint, e in report['endpoints'].items():
+        if e['db_ops']:
+            ops = ', '.join(f'{op}={n}' for op, n in sorted(e['db_ops'].items()))
+            print(f'  {endpoint}: {ops}')
+    if report['background_db_ops']:
+        ops = ', '.join(f'{op}={n}' for op, n in sorted(report['background_db_ops'].items()))
+        print(f'  background: {ops}')
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='GastroVision dinner-rush load test')
+    parser.add_argument('--mongomock', action='store_true', help='use an in-memory Mongo stand-in instead of MONGO_URI')
+    parser.add_argument('--reuse-db', action='store_true', help='allow running against a non-empty restaurant database')
+    parser.add_argument('--tables', type=int, default=20)
+    parser.add_argument('--waiters', type=int, default=4)
+    parser.add_argument('--foods', type=int, default=30)
+    parser.add_argument('--managers', type=int, default=3)
+    parser.add_argument('--duration', type=float, default=30.0, help='seconds of simulated dinner rush')
+    parser.add_argument('--think-time', type=float, default=0.05, help='mean seconds between a table\'s actions')
+    parser.add_argument('--poll-interval', type=float, default=0.5, help='seconds between manager polls')
+    parser.add_argument('--max-orders', type=int, default=6, help='max orders per seating')
+    parser.add_argument('--camera-ratio', type=float, default=0.3, help='fraction of orders sent via /api/camera/food_detected')
+    parser.add_argument('--no-conditional', dest='conditional', action='store_false',
+                        help='managers poll without If-None-Match revalidation')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', dest='json_path', help='also write the report as JSON to this path')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.mongomock:
+        use_mongomock()
+    from backend.app import app, socketio, create_indexes
+    from backend.routes.foods import db
+    from backend.services.food_classifier import FOOD_CLASSES
+    if not args.reuse_db and any(db[name].estimated_document_count() for name in ('foods', 'tables', 'waiters', 'orders')):
+        print(f"Refusing to run: the 'restaurant' database at {os.getenv('MONGO_URI', 'mongodb://localhost:27017')} "
+              "is not empty. Point MONGO_URI at a scratch mongod, use --mongomock, or pass --reuse-db.")
+        return 1
+    create_indexes()
+    stats = EndpointStats()
+    instrument_backend(stats)
+    restaurant = Restaurant(app, stats, args)
+    restaurant.seed(FOOD_CLASSES)
+    stats.reset()
+    dashboard = socketio.test_client(app)
+    dashboard.get_received()
+    elapsed = restaurant.run()
+    # Flush the score deltas still pending so their writes are in the report
+    from backend.services.waiter_scoring import scoreboard
+    scoreboard.checkpoint()
+    socket_events = collections.Counter(event['name'] for event in dashboard.get_received())
+    dashboard.disconnect()
+    report = build_report(stats, elapsed, dict(socket_events))
+    print_report(report)
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,52 @@
+class DocumentModel:
+    """
+    Mixin for slotted dataclass models stored as MongoDB documents.
+    """
+    __slots__ = ()
+
+    @classmethod
+    def from_doc(cls, doc):
+        """
+        Build a model directly from a MongoDB document.
+        Unknown keys (including '_id') are ignored; missing keys use field defaults.
+        """
+        return cls(**{name: doc[name] for name in cls.__slots__ if name in doc})
+
+    def to_dict(self):
+        """
+        Convert the model to a dictionary for database insertion.
+        """
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def require(value, name):
+    """Raise ValueError if a required field is missing or empty."""
+    if value is None or value == '':
+        raise ValueError(f'{name} is required')
+    return value
+
+
+def to_float(value, name):
+    """Coerce a numeric field to float, raising ValueError on bad input."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'{name} must be a number') from None
+
+
+def to_number(value, name):
+    """Coerce a score field to int or float, keeping ints as ints."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return to_float(value, name)
+
+
+def to_int(value, name):
+    """Coerce an integer field to int, raising ValueError on bad input."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'{name} must be an integer') from None
@@ -1,20 +1,19 @@
-class Food:
+from dataclasses import dataclass
+
+from backend.models.base import DocumentModel, require, to_float
+
+
+@dataclass(slots=True)
+class Food(DocumentModel):
     """
     Represents a food item in the restaurant.
     """
-    def __init__(self, food_id, name, category, price):
-        self.food_id = food_id  # Unique identifier for the food
-        self.name = name        # Name of the food
-        self.category = category  # Category (e.g., soup, salad, dessert, grill, stew)
-        self.price = price      # Price of the food
+    food_id: str            # Unique identifier for the food
+    name: str               # Name of the food
+    category: str = None    # Category (e.g., soup, salad, dessert, grill, stew)
+    price: float = 0.0      # Price of the food
 
-    def to_dict(self):
-        """
-        Convert the Food object to a dictionary for database insertion.
-        """
-        return {
-            'food_id': self.food_id,
-            'name': self.name,
-            'category': self.category,
-            'price': self.price
-        } 
\ No newline at end of file
+    def __post_init__(self):
+        require(self.food_id, 'food_id')
+        require(self.name, 'name')
+        self.price = to_float(self.price, 'price')
@@ -1,28 +1,26 @@
-class Order:
+from dataclasses import dataclass
+
+from backend.models.base import DocumentModel, require, to_float, to_int
+
+
+@dataclass(slots=True)
+class Order(DocumentModel):
     """
     Represents an order placed at a table in the restaurant.
     """
-    def __init__(self, order_id, table_id, waiter_id, food_id, food_name, quantity, price, timestamp):
-        self.order_id = order_id      # Unique identifier for the order
-        self.table_id = table_id      # Table where the order was placed
-        self.waiter_id = waiter_id    # Waiter responsible for the order
-        self.food_id = food_id        # Food item ordered
-        self.food_name = food_name    # Name of the food item
-        self.quantity = quantity      # Quantity ordered
-        self.price = price            # Total price
-        self.timestamp = timestamp    # Time when the order was placed
+    order_id: str           # Unique identifier for the order
+    table_id: str = None    # Table where the order was placed
+    waiter_id: str = None   # Waiter responsible for the order
+    food_id: str = None     # Food item ordered
+    food_name: str = None   # Name of the food item
+    quantity: int = 1       # Quantity ordered
+    price: float = 0.0      # Total price
+    timestamp: str = None   # Time when the order was placed
+    session_id: str = None  # Table session (seating) the order belongs to
 
-    def to_dict(self):
-        """
-        Convert the Order object to a dictionary for database insertion.
-        """
-        return {
-            'order_id': self.order_id,
-            'table_id': self.table_id,
-            'waiter_id': self.waiter_id,
-            'food_id': self.food_id,
-            'food_name': self.food_name,
-            'quantity': self.quantity,
-            'price': self.price,
-            'timestamp': self.timestamp
-        } 
\ No newline at end of file
+    def __post_init__(self):
+        require(self.order_id, 'order_id')
+        self.quantity = to_int(self.quantity, 'quantity')
+        if self.quantity < 1:
+            raise ValueError('quantity must be at least 1')
+        self.price = to_float(self.price, 'price')
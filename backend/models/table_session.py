@@ -0,0 +1,24 @@
+from dataclasses import dataclass
+
+from backend.models.base import DocumentModel, require, to_float, to_int
+
+
+@dataclass(slots=True)
+class TableSession(DocumentModel):
+    """
+    Represents one seating at a table, from occupation until the table is reset.
+    """
+    session_id: str             # Unique identifier for the seating
+    table_id: str               # Table the session belongs to
+    waiter_id: str = None       # Waiter assigned when the session opened
+    status: str = 'open'        # 'open' or 'closed'
+    opened_at: str = None       # Time the session was opened
+    closed_at: str = None       # Time the table was reset
+    bill_total: float = 0.0     # Running total of the session's orders
+    order_count: int = 0        # Number of orders in the session
+
+    def __post_init__(self):
+        require(self.session_id, 'session_id')
+        require(self.table_id, 'table_id')
+        self.bill_total = to_float(self.bill_total, 'bill_total')
+        self.order_count = to_int(self.order_count, 'order_count')
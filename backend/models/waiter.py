@@ -1,22 +1,20 @@
-class Waiter:
+from dataclasses import dataclass
+
+from backend.models.base import DocumentModel, require, to_number
+
+
+@dataclass(slots=True)
+class Waiter(DocumentModel):
     """
     Represents a waiter in the restaurant.
     """
-    def __init__(self, waiter_id, name, code, performance=0, interest_level=0):
-        self.waiter_id = waiter_id        # Unique identifier for the waiter
-        self.name = name                  # Name of the waiter
-        self.code = code                  # QR code or number for the waiter
-        self.performance = performance    # Performance score
-        self.interest_level = interest_level  # Interest/attention level
+    waiter_id: str              # Unique identifier for the waiter
+    name: str = None            # Name of the waiter
+    code: str = None            # QR code or number for the waiter
+    performance: float = 0      # Performance score
+    interest_level: float = 0   # Interest/attention level
 
-    def to_dict(self):
-        """
-        Convert the Waiter object to a dictionary for database insertion.
-        """
-        return {
-            'waiter_id': self.waiter_id,
-            'name': self.name,
-            'code': self.code,
-            'performance': self.performance,
-            'interest_level': self.interest_level
-        } 
\ No newline at end of file
+    def __post_init__(self):
+        require(self.waiter_id, 'waiter_id')
+        self.performance = to_number(self.performance, 'performance')
+        self.interest_level = to_number(self.interest_level, 'interest_level')
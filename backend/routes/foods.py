@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
 from pymongo import MongoClient
 from backend.models.food import Food
+from backend.utils.cache import bump, cached_response
 import os
 
 bp = Blueprint('foods', __name__)
@@ -17,16 +18,21 @@ def add_food():
     Add a new food item to the database.
     """
     data = request.json
-    food = Food(
-        food_id=data.get('food_id'),
-        name=data.get('name'),
-        category=data.get('category'),
-        price=data.get('price')
-    )
+    try:
+        food = Food(
+            food_id=data.get('food_id'),
+            name=data.get('name'),
+            category=data.get('category'),
+            price=data.get('price')
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     foods_collection.insert_one(food.to_dict())
+    bump('foods')
     return jsonify({'message': 'Food added'}), 201
 
 @bp.route('/foods', methods=['GET'])
+@cached_response('foods')
 def list_foods():
     """
     List all food items in the database.
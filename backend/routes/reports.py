@@ -1,6 +1,11 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from pymongo import MongoClient
 from backend.models.order import Order
+from backend.models.food import Food
+from backend.utils.cache import bump, cached_response
+from backend.services.table_sessions import record_order
+from backend.services import order_export
+from backend.services.waiter_scoring import scoreboard
 import os
 import datetime
 import uuid
@@ -12,6 +17,8 @@ MONGO_URI = os.getenv('MONGO_URI', 'mongodb://localhost:27017')
 client = MongoClient(MONGO_URI)
 db = client['restaurant']
 orders_collection = db['orders']
+# Orders of closed table sessions, moved here by /reset_table
+archive_collection = db['orders_archive']
 
 @bp.route('/orders', methods=['POST'])
 def add_order():
@@ -25,83 +32,103 @@ def add_order():
     waiter_id = data.get('waiter_id')
     # Get food info and price
     foods_collection = db['foods']
-    food = foods_collection.find_one({'food_id': food_id})
-    if not food:
+    food_doc = foods_collection.find_one({'food_id': food_id})
+    if not food_doc:
         return jsonify({'error': 'Food not found'}), 400
-    price = float(food.get('price', 0)) * quantity
-    food_name = food.get('name')
+    food = Food.from_doc(food_doc)
+    price = food.price * quantity
+    food_name = food.name
     # Save the order
-    order = Order(
-        order_id=str(uuid.uuid4()),
-        table_id=table_id,
-        waiter_id=waiter_id,
-        food_id=food_id,
-        food_name=food_name,
-        quantity=quantity,
-        price=price,
-        timestamp=datetime.datetime.now().isoformat()
-    )
-    orders_collection.insert_one(order.to_dict())
+    try:
+        order = Order(
+            order_id=str(uuid.uuid4()),
+            table_id=table_id,
+            waiter_id=waiter_id,
+            food_id=food_id,
+            food_name=food_name,
+            quantity=quantity,
+            price=price,
+            timestamp=datetime.datetime.now().isoformat()
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    record_order(order.to_dict())
     # Increase waiter's performance
-    waiters_collection = db['waiters']
-    waiters_collection.update_one({'waiter_id': waiter_id}, {'$inc': {'performance': 1}})
+    scoreboard.order(waiter_id)
+    bump('orders')
     # (Interest level and delay infrastructure can be extended here)
     return jsonify({'message': 'Order saved'}), 201
 
 @bp.route('/orders', methods=['GET'])
 def list_orders():
     """
-    List all orders, with optional filters for table, waiter, food, and date range.
+    List all orders, with optional filters for table, waiter, food, session, and date range.
+    Only open orders are listed unless include_archived=1 is given.
     """
-    query = {}
-    table_id = request.args.get('table_id')
-    waiter_id = request.args.get('waiter_id')
-    food_name = request.args.get('food_name')
-    start_date = request.args.get('start_date')
-    end_date = request.args.get('end_date')
-    if table_id:
-        query['table_id'] = table_id
-    if waiter_id:
-        query['waiter_id'] = waiter_id
-    if food_name:
-        query['food_name'] = food_name
-    if start_date or end_date:
-        query['timestamp'] = {}
-        if start_date:
-            query['timestamp']['$gte'] = start_date
-        if end_date:
-            query['timestamp']['$lte'] = end_date
-        if not query['timestamp']:
-            del query['timestamp']
+    query = order_export.build_order_query(request.args)
     orders = list(orders_collection.find(query, {'_id': 0}))
+    if request.args.get('include_archived') in ('1', 'true'):
+        orders = list(archive_collection.find(query, {'_id': 0})) + orders
     return jsonify(orders)
 
+@bp.route('/orders/export', methods=['GET'])
+def export_orders():
+    """
+    Stream orders as CSV (default), Parquet or Arrow, with the same filters as GET /orders.
+    Archived orders are included unless include_archived=0. Pass after=<timestamp|order_id>
+    (the key of the last exported row) to resume an interrupted export.
+    """
+    fmt = request.args.get('format', 'csv')
+    if fmt not in order_export.FORMATS:
+        return jsonify({'error': f"format must be one of: {', '.join(sorted(order_export.FORMATS))}"}), 400
+    if fmt != 'csv' and order_export.pa is None:
+        return jsonify({'error': 'pyarrow is not installed on the server; use format=csv'}), 400
+    after = request.args.get('after')
+    if after:
+        try:
+            order_export.parse_resume_key(after)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+    rows = order_export.iter_orders(
+        order_export.build_order_query(request.args),
+        after=after,
+        include_archived=request.args.get('include_archived', '1') in ('1', 'true')
+    )
+    mimetype, extension = order_export.FORMATS[fmt]
+    return Response(
+        stream_with_context(order_export.iter_export(fmt, rows)),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename=orders.{extension}'}
+    )
+
+def _merged_groups(group, field):
+    """
+    Run a $group stage over open and archived orders and add up `field` per group key.
+    """
+    totals = {}
+    for collection in (orders_collection, archive_collection):
+        for row in collection.aggregate([{"$group": group}]):
+            totals[row['_id']] = totals.get(row['_id'], 0) + row[field]
+    return [{'_id': key, field: value} for key, value in totals.items()]
+
 @bp.route('/api/reports/summary', methods=['GET'])
+@cached_response('orders')
 def report_summary():
     """
     Get summary statistics for orders, top foods, waiter performance, and table revenue.
+    Covers both open and archived orders.
     """
     # Total number of orders
-    total_orders = orders_collection.count_documents({})
+    total_orders = orders_collection.count_documents({}) + archive_collection.count_documents({})
     # Top 5 most consumed foods
-    pipeline_foods = [
-        {"$group": {"_id": "$food_name", "count": {"$sum": "$quantity"}}},
-        {"$sort": {"count": -1}},
-        {"$limit": 5}
-    ]
-    top_foods = list(orders_collection.aggregate(pipeline_foods))
+    top_foods = _merged_groups({"_id": "$food_name", "count": {"$sum": "$quantity"}}, 'count')
+    top_foods = sorted(top_foods, key=lambda row: row['count'], reverse=True)[:5]
     # Waiter performance (total orders per waiter)
-    pipeline_waiters = [
-        {"$group": {"_id": "$waiter_id", "count": {"$sum": 1}}},
-        {"$sort": {"count": -1}}
-    ]
-    waiter_performance = list(orders_collection.aggregate(pipeline_waiters))
+    waiter_performance = _merged_groups({"_id": "$waiter_id", "count": {"$sum": 1}}, 'count')
+    waiter_performance.sort(key=lambda row: row['count'], reverse=True)
     # Table-based total revenue
-    pipeline_tables = [
-        {"$group": {"_id": "$table_id", "total": {"$sum": "$price"}}},
-        {"$sort": {"_id": 1}}
-    ]
-    table_revenue = list(orders_collection.aggregate(pipeline_tables))
+    table_revenue = _merged_groups({"_id": "$table_id", "total": {"$sum": "$price"}}, 'total')
+    table_revenue.sort(key=lambda row: (row['_id'] is not None, str(row['_id'])))
     return jsonify({
         "total_orders": total_orders,
         "top_foods": top_foods,
@@ -2,15 +2,20 @@ from flask import Blueprint, request, jsonify
 from pymongo import MongoClient
 from backend.models.table import Table
 from backend.models.order import Order
+from backend.models.food import Food
 import os
 import datetime
 import threading
 import uuid
-from backend.services.video_stream import predict_food_yolov8, FOOD_CLASSES
+from backend.services.food_classifier import predict_food_yolov8, FOOD_CLASSES
 import numpy as np
 import cv2
 from flask_socketio import SocketIO
 from backend.socketio_instance import socketio
+from backend.utils.cache import bump, cached_response
+from backend.services.classification_jobs import classification_jobs, QueueFull
+from backend.services.table_sessions import open_session, record_order, close_session, get_current_bill
+from backend.services.waiter_scoring import scoreboard, response_delay
 
 bp = Blueprint('tables', __name__)
 
@@ -26,15 +31,20 @@ def add_table():
     Add a new table to the database.
     """
     data = request.json
-    table = Table(
-        table_id=data.get('table_id'),
-        waiter_id=data.get('waiter_id'),
-        status=data.get('status', 'empty')
-    )
+    try:
+        table = Table(
+            table_id=data.get('table_id'),
+            waiter_id=data.get('waiter_id'),
+            status=data.get('status', 'empty')
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     tables_collection.insert_one(table.to_dict())
+    bump('tables')
     return jsonify({'message': 'Table added'}), 201
 
 @bp.route('/tables', methods=['GET'])
+@cached_response('tables')
 def list_tables():
     """
     List all tables in the database.
@@ -62,11 +72,11 @@ def update_table_status():
             if table and table.get('status') == 'occupied':
                 waiter_id = table.get('waiter_id')
                 if waiter_id:
-                    waiters_collection = db['waiters']
-                    waiters_collection.update_one({'waiter_id': waiter_id}, {'$inc': {'performance': -1, 'interest_level': -1}})
+                    scoreboard.penalty(waiter_id, performance=1, interest_level=1)
                     # Send delay warning to frontend
                     socketio.emit('waiter_delay_warning', {'table_id': table_id, 'waiter_id': waiter_id})
         timer = threading.Timer(60, waiter_delay_penalty)
+        timer.daemon = True
         timer.start()
     elif status == 'served':
         update_fields['last_waiter_time'] = datetime.datetime.now().isoformat()
@@ -74,26 +84,39 @@ def update_table_status():
         table = tables_collection.find_one({'table_id': table_id})
         waiter_id = table.get('waiter_id') if table else None
         if waiter_id:
-            waiters_collection = db['waiters']
-            waiters_collection.update_one({'waiter_id': waiter_id}, {'$inc': {'interest_level': 1}})
+            scoreboard.served(waiter_id, delay=response_delay(table))
     tables_collection.update_one({'table_id': table_id}, {'$set': update_fields})
+    if status == 'occupied':
+        # A new seating starts a table session (kept if one is already open)
+        open_session(table_id)
+    bump('tables')
     return {'message': 'Table status updated.'}
 
 @bp.route('/reset_table', methods=['POST'])
 def reset_table():
     """
-    Reset a table: delete all orders for the table and set its status to empty.
+    Reset a table: close its session, archive its orders and set its status to empty.
     """
     data = request.json
     table_id = data.get('table_id')
     if not table_id:
         return {'error': 'table_id is required'}, 400
-    # Delete all orders for the table
-    orders_collection = db['orders']
-    result = orders_collection.delete_many({'table_id': table_id})
+    # Close the session and move its orders to the archive
+    archived, session = close_session(table_id)
     # Reset table status and waiter assignment
     tables_collection.update_one({'table_id': table_id}, {'$set': {'status': 'empty', 'waiter_id': None}})
-    return {'message': f'{result.deleted_count} orders deleted, table reset.'}
+    bump('orders', 'tables')
+    return {'message': f'{archived} orders archived, table reset.', 'session': session}
+
+@bp.route('/tables/<table_id>/bill', methods=['GET'])
+def table_bill(table_id):
+    """
+    Get the open bill of a table from its current session.
+    """
+    session = get_current_bill(table_id)
+    if not session:
+        return {'table_id': table_id, 'session_id': None, 'bill_total': 0.0, 'order_count': 0}
+    return session
 
 @bp.route('/tables/auto_assign', methods=['POST'])
 def auto_assign_tables():
@@ -113,19 +136,75 @@ def auto_assign_tables():
             waiter_id = waiters[1]['waiter_id']
         tables_collection.update_one({'table_id': table['table_id']}, {'$set': {'waiter_id': waiter_id}})
         updates.append({'table_id': table['table_id'], 'waiter_id': waiter_id})
+    bump('tables')
     return {'message': 'Tables automatically assigned to waiters.', 'assignments': updates}, 200
 
+def _save_camera_order(table_id, waiter_id, food_id, food_name, price):
+    """
+    Save an order detected by the camera, update waiter performance and broadcast it.
+    Returns the saved order as a dict.
+    """
+    order = Order(
+        order_id=str(uuid.uuid4()),
+        table_id=table_id,
+        waiter_id=waiter_id,
+        food_id=food_id,
+        food_name=food_name,
+        quantity=1,
+        price=price,
+        timestamp=datetime.datetime.now().isoformat()
+    )
+    order_doc = record_order(order.to_dict())
+    # Increase waiter's performance
+    scoreboard.order(waiter_id)
+    bump('orders')
+    # Broadcast the new order to all clients
+    socketio.emit('order_update', order_doc)
+    return order_doc
+
+def _complete_classification_job(job):
+    """
+    Create the order for a finished classification job and notify clients.
+    Runs in a background thread; returns the fields to store on the job.
+    """
+    food_name = job['food_name']
+    food_doc = db['foods'].find_one({'name': food_name})
+    table = tables_collection.find_one({'table_id': job['table_id']})
+    waiter_id = table.get('waiter_id') if table else None
+    if not food_doc:
+        result = {'status': 'failed', 'error': f'Food not found: {food_name}'}
+    elif not waiter_id:
+        result = {'status': 'failed', 'error': 'No waiter assigned to table'}
+    else:
+        food = Food.from_doc(food_doc)
+        order = _save_camera_order(job['table_id'], waiter_id, food.food_id, food_name, food.price)
+        result = {'status': 'done', 'order_id': order['order_id']}
+    socketio.emit('classification_done', {**job, **result})
+    return result
+
 @bp.route('/api/camera/food_detected', methods=['POST'])
 def camera_food_detected():
     """
     Handle food detection from camera image or manual input.
     If image is provided, use YOLOv8 model to predict food.
     Otherwise, use provided food_id.
+    With ?async=1 (or form field async=1), the image is queued for classification
+    and a job ID is returned immediately; poll /api/camera/jobs/<job_id> for the result.
     """
     # If image file is provided (multipart/form-data)
     if 'image' in request.files:
-        image_file = request.files['image']
-        file_bytes = np.frombuffer(image_file.read(), np.uint8)
+        image_bytes = request.files['image'].read()
+        if (request.args.get('async') or request.form.get('async')) in ('1', 'true'):
+            t_id = request.form.get('table_id')
+            if not t_id:
+                return {'error': 'table_id is required'}, 400
+            try:
+                job = classification_jobs.submit(image_bytes, _complete_classification_job, table_id=t_id)
+            except QueueFull as e:
+                return {'error': f'Classification queue is full: {e}'}, 429, {'Retry-After': '1'}
+            job['status_url'] = f"/api/camera/jobs/{job['job_id']}"
+            return job, 202
+        file_bytes = np.frombuffer(image_bytes, np.uint8)
         img = cv2.imdecode(file_bytes, cv2.IMREAD_COLOR)
         food_name, _ = predict_food_yolov8(img)
         # Find food_id from foods collection
@@ -133,8 +212,9 @@ def camera_food_detected():
         food_doc = foods_collection.find_one({'name': food_name})
         if not food_doc:
             return {'error': f'Food not found: {food_name}'}, 400
-        food_id = food_doc.get('food_id')
-        price = float(food_doc.get('price', 0))
+        food = Food.from_doc(food_doc)
+        food_id = food.food_id
+        price = food.price
     else:
         # Use manual JSON input (food_id provided)
         data = request.json
@@ -147,8 +227,9 @@ def camera_food_detected():
         food_doc = foods_collection.find_one({'food_id': food_id})
         if not food_doc:
             return {'error': 'Food not found'}, 400
-        price = float(food_doc.get('price', 0)) * quantity
-        food_name = food_doc.get('name')
+        food = Food.from_doc(food_doc)
+        price = food.price * quantity
+        food_name = food.name
     # Find waiter assigned to the table
     if 'table_id' in locals():
         t_id = table_id
@@ -161,25 +242,19 @@ def camera_food_detected():
     if not waiter_id:
         return {'error': 'No waiter assigned to table'}, 400
     # Save the order
-    order = Order(
-        order_id=str(uuid.uuid4()),
-        table_id=t_id,
-        waiter_id=waiter_id,
-        food_id=food_id,
-        food_name=food_name,
-        quantity=1,
-        price=price,
-        timestamp=datetime.datetime.now().isoformat()
-    )
-    orders_collection = db['orders']
-    orders_collection.insert_one(order.to_dict())
-    # Increase waiter's performance
-    waiters_collection = db['waiters']
-    waiters_collection.update_one({'waiter_id': waiter_id}, {'$inc': {'performance': 1}})
-    # Broadcast the new order to all clients
-    socketio.emit('order_update', order.to_dict())
+    _save_camera_order(t_id, waiter_id, food_id, food_name, price)
     return {'message': f'Order saved via camera: {food_name}'}, 200
 
+@bp.route('/api/camera/jobs/<job_id>', methods=['GET'])
+def camera_job_status(job_id):
+    """
+    Get the status of an asynchronous classification job.
+    """
+    job = classification_jobs.get(job_id)
+    if job is None:
+        return {'error': 'Job not found'}, 404
+    return job
+
 @bp.route('/api/camera/waiter_detected', methods=['POST'])
 def camera_waiter_detected():
     """
@@ -190,9 +265,11 @@ def camera_waiter_detected():
     waiter_id = data.get('waiter_id')
     if not table_id or not waiter_id:
         return {'error': 'table_id and waiter_id are required'}, 400
+    table = tables_collection.find_one({'table_id': table_id}, {'last_customer_time': 1, 'last_waiter_time': 1})
+    delay = response_delay(table)
     # Update table's waiter and status
     tables_collection.update_one({'table_id': table_id}, {'$set': {'waiter_id': waiter_id, 'status': 'served', 'last_waiter_time': datetime.datetime.now().isoformat()}})
     # Increase waiter's interest level
-    waiters_collection = db['waiters']
-    waiters_collection.update_one({'waiter_id': waiter_id}, {'$inc': {'interest_level': 1}})
+    scoreboard.served(waiter_id, delay=delay)
+    bump('tables')
     return {'message': 'Waiter detected by camera, service provided to table.'} 
\ No newline at end of file
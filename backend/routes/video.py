@@ -29,20 +29,20 @@ def last_food():
 @bp.route('/pending_order')
 def pending_order():
     """
-    Get the current pending order detected by the camera.
+    Get the pending orders detected by the camera (optionally ?table_id=).
     """
     return get_pending_order()
 
 @bp.route('/confirm_order', methods=['POST'])
 def confirm_order():
     """
-    Confirm and save the pending order.
+    Confirm and save pending orders (by pending_ids, table_id or all; default: oldest).
     """
     return confirm_pending_order()
 
 @bp.route('/reject_order', methods=['POST'])
 def reject_order():
     """
-    Reject and clear the pending order.
+    Reject and clear pending orders (by pending_ids, table_id or all; default: oldest).
     """
     return reject_pending_order() 
\ No newline at end of file
@@ -1,6 +1,9 @@
 from flask import Blueprint, request, jsonify
 from pymongo import MongoClient
 from backend.models.waiter import Waiter
+from backend.models.base import to_number
+from backend.utils.cache import bump, cached_response
+from backend.services.waiter_scoring import scoreboard, LEADERBOARD_SIZE
 import os
 
 bp = Blueprint('waiters', __name__)
@@ -17,17 +20,23 @@ def add_waiter():
     Add a new waiter to the database.
     """
     data = request.json
-    waiter = Waiter(
-        waiter_id=data.get('waiter_id'),
-        name=data.get('name'),
-        code=data.get('code'),
-        performance=data.get('performance', 0),
-        interest_level=data.get('interest_level', 0)
-    )
+    try:
+        waiter = Waiter(
+            waiter_id=data.get('waiter_id'),
+            name=data.get('name'),
+            code=data.get('code'),
+            performance=data.get('performance', 0),
+            interest_level=data.get('interest_level', 0)
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     waiters_collection.insert_one(waiter.to_dict())
+    scoreboard.register(waiter.to_dict())
+    bump('waiters')
     return jsonify({'message': 'Waiter added'}), 201
 
 @bp.route('/waiters', methods=['GET'])
+@cached_response('waiters')
 def list_waiters():
     """
     List all waiters in the database.
@@ -45,5 +54,34 @@ def update_interest():
     interest_level = data.get('interest_level')
     if not waiter_id or interest_level is None:
         return {'error': 'waiter_id and interest_level are required'}, 400
-    waiters_collection.update_one({'waiter_id': waiter_id}, {'$set': {'interest_level': interest_level}})
-    return {'message': 'Waiter interest level updated.'} 
\ No newline at end of file
+    try:
+        interest_level = to_number(interest_level, 'interest_level')
+    except ValueError as e:
+        return {'error': str(e)}, 400
+    if not scoreboard.set_interest(waiter_id, interest_level):
+        return {'error': 'Waiter not found'}, 404
+    return {'message': 'Waiter interest level updated.'}
+
+@bp.route('/api/waiters/leaderboard', methods=['GET'])
+def waiter_leaderboard():
+    """
+    Get the top waiters by live performance score, with orders per hour and
+    average response delay over the last hour.
+    """
+    try:
+        k = int(request.args.get('k', LEADERBOARD_SIZE))
+    except ValueError:
+        return {'error': 'k must be an integer'}, 400
+    if not 1 <= k <= LEADERBOARD_SIZE:
+        return {'error': f'k must be between 1 and {LEADERBOARD_SIZE}'}, 400
+    return jsonify(scoreboard.leaderboard(k))
+
+@bp.route('/api/waiters/<waiter_id>/metrics', methods=['GET'])
+def waiter_metrics(waiter_id):
+    """
+    Get the live score and rolling metrics of one waiter.
+    """
+    metrics = scoreboard.metrics(waiter_id)
+    if metrics is None:
+        return {'error': 'Waiter not found'}, 404
+    return metrics
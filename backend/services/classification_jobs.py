@@ -0,0 +1,194 @@
+"""
+Asynchronous food classification jobs for camera uploads.
+
+Images are decoded and classified with YOLOv8 in a process pool, so a burst
+of uploads does not tie up the Flask request threads. Jobs go from queued
+to running when a worker picks them up, then to done or failed. Result
+handlers (database writes, Socket.IO emits) run in a small thread pool, not
+on the process pool's management thread. The number of unfinished jobs is
+bounded; submit() raises QueueFull when the bound is reached so the route
+can answer 429 instead of timing out.
+"""
+import datetime
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import cv2
+import numpy as np
+
+# Number of classifier worker processes
+CLASSIFY_WORKERS = int(os.getenv('CLASSIFY_WORKERS', '2'))
+# Maximum number of queued or running jobs before new uploads are rejected
+CLASSIFY_QUEUE_SIZE = int(os.getenv('CLASSIFY_QUEUE_SIZE', '16'))
+# Seconds a finished job stays available from the status endpoint
+CLASSIFY_JOB_TTL = float(os.getenv('CLASSIFY_JOB_TTL', '600'))
+# Threads running result handlers of finished jobs
+CLASSIFY_RESULT_THREADS = int(os.getenv('CLASSIFY_RESULT_THREADS', '2'))
+
+# Set in worker processes: job IDs are reported here when work on them starts
+_started_queue = None
+
+
+class QueueFull(Exception):
+    """Raised when the classification queue is at capacity."""
+
+
+def _init_worker(started_queue):
+    """Load the classifier once per worker process."""
+    global _started_queue
+    _started_queue = started_queue
+    import torch
+    # One intra-op thread per process avoids oversubscribing the CPU
+    torch.set_num_threads(1)
+    import backend.services.food_classifier  # noqa: F401
+
+
+def _classify(job_id, image_bytes):
+    """Decode an uploaded image and return (food_name, confidence)."""
+    from backend.services.food_classifier import predict_food_yolov8
+    _started_queue.put(job_id)
+    img = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_COLOR)
+    if img is None:
+        raise ValueError('Image could not be decoded')
+    return predict_food_yolov8(img)
+
+
+class ClassificationJobs:
+    """
+    Tracks classification jobs and runs them in a process pool.
+    """
+    def __init__(self, workers=CLASSIFY_WORKERS, queue_size=CLASSIFY_QUEUE_SIZE, ttl=CLASSIFY_JOB_TTL,
+                 result_threads=CLASSIFY_RESULT_THREADS):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.ttl = ttl
+        self.result_threads = result_threads
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._active = 0
+        self._executor = None
+        self._results = None
+        self._started = None
+
+    def _get_executor(self):
+        """Return the process pool, creating it (and its helpers) if needed. Caller holds the lock."""
+        if self._executor is None:
+            # spawn: forking a process that already holds torch threads can deadlock
+            context = multiprocessing.get_context('spawn')
+            if self._started is None:
+                self._started = context.Queue()
+                threading.Thread(target=self._watch_started, daemon=True).start()
+                self._results = ThreadPoolExecutor(max_workers=self.result_threads,
+                                                   thread_name_prefix='classify-result')
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(self._started,)
+            )
+        return self._executor
+
+    def _watch_started(self):
+        """Mark jobs as running as the workers report picking them up."""
+        while True:
+            job_id = self._started.get()
+            with self._lock:
+                job = self._jobs.get(job_id)
+                if job is not None and job['status'] == 'queued':
+                    job['status'] = 'running'
+                    job['started_at'] = datetime.datetime.now().isoformat()
+
+    def submit(self, image_bytes, on_result, **meta):
+        """
+        Queue an image for classification and return the job dict.
+        on_result(job) runs in a background thread once the prediction is known
+        and may return a dict of extra fields to store on the job.
+        """
+        with self._lock:
+            self._prune()
+            if self._active >= self.queue_size:
+                raise QueueFull(f'{self._active} classification jobs in progress')
+            job_id = str(uuid.uuid4())
+            job = {
+                'job_id': job_id,
+                'status': 'queued',
+                'created_at': datetime.datetime.now().isoformat(),
+                **meta
+            }
+            self._jobs[job_id] = job
+            self._active += 1
+            try:
+                try:
+                    future = self._get_executor().submit(_classify, job_id, image_bytes)
+                except BrokenProcessPool:
+                    self._executor = None
+                    future = self._get_executor().submit(_classify, job_id, image_bytes)
+            except Exception:
+                del self._jobs[job_id]
+                self._active -= 1
+                raise
+            job = dict(job)
+            results = self._results
+        future.add_done_callback(lambda f: self._dispatch(results, job_id, f, on_result))
+        return job
+
+    def _dispatch(self, results, job_id, future, on_result):
+        """
+        Done-callback: hand the job to the result threads, keeping the process
+        pool's management thread free for other jobs.
+        """
+        try:
+            results.submit(self._finish, job_id, future, on_result)
+        except RuntimeError:
+            # Interpreter shutting down: finish inline so the job is not lost
+            self._finish(job_id, future, on_result)
+
+    def _finish(self, job_id, future, on_result):
+        """Store the outcome of a job and run its result handler (in the result thread pool)."""
+        update = {'finished_at': datetime.datetime.now().isoformat()}
+        try:
+            food_name, confidence = future.result()
+            update.update({'food_name': food_name, 'confidence': confidence})
+            with self._lock:
+                job = dict(self._jobs[job_id], **update)
+            update.update(on_result(job) or {})
+            update.setdefault('status', 'done')
+        except BrokenProcessPool as e:
+            with self._lock:
+                self._executor = None
+            update.update({'status': 'failed', 'error': f'Classifier process crashed: {e}'})
+        except Exception as e:
+            update.update({'status': 'failed', 'error': str(e)})
+        with self._lock:
+            self._jobs[job_id].update(update)
+            self._jobs[job_id]['_finished'] = time.monotonic()
+            self._active -= 1
+
+    def _prune(self):
+        """Drop finished jobs older than the TTL. Caller holds the lock."""
+        cutoff = time.monotonic() - self.ttl
+        expired = [job_id for job_id, job in self._jobs.items() if job.get('_finished', cutoff + 1) < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        """Return a copy of the job, or None if unknown or expired."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            return {k: v for k, v in job.items() if not k.startswith('_')}
+
+    def stats(self):
+        """Return the number of active jobs and the queue bound."""
+        with self._lock:
+            return {'active': self._active, 'queue_size': self.queue_size}
+
+
+# Shared job queue used by the camera routes
+classification_jobs = ClassificationJobs()
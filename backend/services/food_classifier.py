@@ -0,0 +1,66 @@
+"""
+YOLOv8 Food-101 classifier shared by the live stream, the camera routes and
+the classification worker processes.
+
+Kept free of database and stream dependencies so worker processes can load
+the model without connecting to MongoDB.
+"""
+import os
+
+from backend.services.preprocess import PreprocessorPool
+
+# Load Food-101 class names
+FOOD_CLASSES = [
+    'apple_pie', 'baby_back_ribs', 'baklava', 'beef_carpaccio', 'beef_tartare', 'beet_salad', 'beignets',
+    'bibimbap', 'bread_pudding', 'breakfast_burrito', 'bruschetta', 'caesar_salad', 'cannoli', 'caprese_salad',
+    'carrot_cake', 'ceviche', 'cheesecake', 'cheese_plate', 'chicken_curry', 'chicken_quesadilla', 'chicken_wings',
+    'chocolate_cake', 'chocolate_mousse', 'churros', 'clam_chowder', 'club_sandwich', 'crab_cakes', 'creme_brulee',
+    'croque_madame', 'cup_cakes', 'deviled_eggs', 'donuts', 'dumplings', 'edamame', 'eggs_benedict', 'escargots',
+    'falafel', 'filet_mignon', 'fish_and_chips', 'foie_gras', 'french_fries', 'french_onion_soup', 'french_toast',
+    'fried_calamari', 'fried_rice', 'frozen_yogurt', 'garlic_bread', 'gnocchi', 'greek_salad', 'grilled_cheese_sandwich',
+    'grilled_salmon', 'guacamole', 'gyoza', 'hamburger', 'hot_and_sour_soup', 'hot_dog', 'huevos_rancheros', 'hummus',
+    'ice_cream', 'lasagna', 'lobster_bisque', 'lobster_roll_sandwich', 'macaroni_and_cheese', 'macarons', 'miso_soup',
+    'mussels', 'nachos', 'omelette', 'onion_rings', 'oysters', 'pad_thai', 'paella', 'pancakes', 'panna_cotta',
+    'peking_duck', 'pho', 'pizza', 'pork_chop', 'poutine', 'prime_rib', 'pulled_pork_sandwich', 'ramen', 'ravioli',
+    'red_velvet_cake', 'risotto', 'samosa', 'sashimi', 'scallops', 'seaweed_salad', 'shrimp_and_grits', 'spaghetti_bolognese',
+    'spaghetti_carbonara', 'spring_rolls', 'steak', 'strawberry_shortcake', 'sushi', 'tacos', 'takoyaki', 'tiramisu',
+    'tuna_tartare', 'waffles'
+]
+
+# YOLOv8-based Food101 classifier (ultralytics)
+try:
+    from ultralytics import YOLO
+    YOLOV8_MODEL_PATH = os.path.join(os.path.dirname(__file__), '..', 'food101_yolov8_cls.pt')
+    yolov8_model = YOLO(YOLOV8_MODEL_PATH)
+    YOLOV8_IMGSZ = yolov8_model.overrides.get('imgsz') or 224
+    if isinstance(YOLOV8_IMGSZ, (list, tuple)):
+        YOLOV8_IMGSZ = YOLOV8_IMGSZ[0]
+    # Same geometry as ultralytics' classify transforms (resize shorter side + center crop), RGB in [0, 1]
+    yolov8_preprocess = PreprocessorPool(size=YOLOV8_IMGSZ, crop=1.0)
+except Exception as e:
+    print(f"WARNING: YOLOv8 model could not be loaded: {e}")
+    yolov8_model = None
+
+def predict_food_yolov8(image):
+    """
+    Predict the food class using YOLOv8 model.
+    Args:
+        image: numpy array (BGR, OpenCV)
+    Returns:
+        predicted class name (str), confidence (float)
+    """
+    if yolov8_model is None:
+        print('YOLOv8 model not loaded!')
+        return 'unknown', 0.0
+    class_idx = None
+    confidence = 0.0
+    # The input tensor is the pooled buffer: read the result before returning it
+    with yolov8_preprocess.acquire() as preprocess:
+        results = yolov8_model(preprocess(image), verbose=False)
+        result = results[0] if isinstance(results, (list, tuple)) else results
+        if hasattr(result, 'probs') and result.probs is not None:
+            class_idx = int(result.probs.top1)
+            confidence = float(result.probs.data[class_idx])
+    if class_idx is not None and 0 <= class_idx < len(FOOD_CLASSES):
+        return FOOD_CLASSES[class_idx], confidence
+    return 'unknown', 0.0
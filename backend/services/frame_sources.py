@@ -0,0 +1,234 @@
+"""
+Pluggable frame sources for the camera pipeline.
+
+A frame source yields (timestamp, frame) pairs, where frame is a BGR uint8
+numpy array as returned by OpenCV and timestamp is in seconds. Sources:
+    - WebcamSource: a live camera (cv2.VideoCapture(index))
+    - VideoFileSource: a video file decoded with OpenCV
+    - ImageSequenceSource: a directory of still images played at a fixed fps
+    - RecordedSession: frames and timestamps recorded with SessionRecorder
+
+Recorded sessions are directories holding a raw frames.u8 file that is
+memory-mapped on read, a timestamps.npy array and a session.json header.
+"""
+import json
+import os
+import time
+
+import cv2
+import numpy as np
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+SESSION_HEADER = 'session.json'
+SESSION_FRAMES = 'frames.u8'
+SESSION_TIMESTAMPS = 'timestamps.npy'
+
+
+class FrameSource:
+    """
+    Base class for frame sources. Subclasses implement read().
+    """
+    fps = None  # Nominal frames per second, if known
+
+    def read(self):
+        """
+        Return (timestamp, frame) for the next frame, or None when exhausted.
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """Release any underlying resources."""
+
+    def __iter__(self):
+        while True:
+            item = self.read()
+            if item is None:
+                return
+            yield item
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class WebcamSource(FrameSource):
+    """
+    Live frames from a camera device, timestamped with the monotonic clock.
+    """
+    def __init__(self, index=0):
+        self.capture = cv2.VideoCapture(index)
+        self.fps = self.capture.get(cv2.CAP_PROP_FPS) or None
+
+    def read(self):
+        success, frame = self.capture.read()
+        if not success:
+            return None
+        return time.monotonic(), frame
+
+    def close(self):
+        self.capture.release()
+
+
+class VideoFileSource(FrameSource):
+    """
+    Frames decoded from a video file, timestamped by frame index and fps.
+    """
+    def __init__(self, path):
+        if not os.path.isfile(path):
+            raise FileNotFoundError(path)
+        self.capture = cv2.VideoCapture(path)
+        self.fps = self.capture.get(cv2.CAP_PROP_FPS) or 30.0
+        self.index = 0
+
+    def read(self):
+        success, frame = self.capture.read()
+        if not success:
+            return None
+        timestamp = self.index / self.fps
+        self.index += 1
+        return timestamp, frame
+
+    def close(self):
+        self.capture.release()
+
+
+class ImageSequenceSource(FrameSource):
+    """
+    Still images from a directory, read in filename order at a fixed fps.
+    """
+    def __init__(self, directory, fps=10.0):
+        self.paths = sorted(
+            os.path.join(directory, name) for name in os.listdir(directory)
+            if name.lower().endswith(IMAGE_EXTENSIONS)
+        )
+        if not self.paths:
+            raise FileNotFoundError(f'No images found in {directory}')
+        self.fps = fps
+        self.index = 0
+
+    def read(self):
+        while self.index < len(self.paths):
+            path = self.paths[self.index]
+            timestamp = self.index / self.fps
+            self.index += 1
+            frame = cv2.imread(path, cv2.IMREAD_COLOR)
+            if frame is not None:
+                return timestamp, frame
+            print(f'WARNING: could not read image {path}, skipping.')
+        return None
+
+
+class RecordedSession(FrameSource):
+    """
+    Replays a session written by SessionRecorder.
+    Frames are read-only views into a memory-mapped file; copy before drawing on them.
+    """
+    def __init__(self, directory):
+        with open(os.path.join(directory, SESSION_HEADER)) as f:
+            header = json.load(f)
+        self.count = header['count']
+        self.shape = tuple(header['shape'])
+        self.fps = header.get('fps')
+        self.timestamps = np.load(os.path.join(directory, SESSION_TIMESTAMPS))
+        if self.count:
+            self.frames = np.memmap(os.path.join(directory, SESSION_FRAMES), dtype=np.uint8,
+                                    mode='r', shape=(self.count,) + self.shape)
+        else:
+            self.frames = np.empty((0,) + self.shape, dtype=np.uint8)
+        self.index = 0
+
+    def __len__(self):
+        return self.count
+
+    def read(self):
+        if self.index >= self.count:
+            return None
+        i = self.index
+        self.index += 1
+        return float(self.timestamps[i]), self.frames[i]
+
+    def close(self):
+        # Views handed out by read() keep the mapping alive until they are released
+        self.frames = None
+
+
+class SessionRecorder:
+    """
+    Writes frames and timestamps into a RecordedSession directory.
+    All frames must have the shape of the first one.
+    """
+    def __init__(self, directory, fps=None):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.fps = fps
+        self.shape = None
+        self.timestamps = []
+        self.file = open(os.path.join(directory, SESSION_FRAMES), 'wb')
+
+    def write(self, timestamp, frame):
+        """Append one BGR uint8 frame."""
+        if frame.dtype != np.uint8 or frame.ndim != 3:
+            raise ValueError('frames must be HxWxC uint8 arrays')
+        if self.shape is None:
+            self.shape = frame.shape
+        elif frame.shape != self.shape:
+            raise ValueError(f'frame shape {frame.shape} does not match session shape {self.shape}')
+        self.file.write(np.ascontiguousarray(frame).data)
+        self.timestamps.append(timestamp)
+
+    def close(self):
+        """Flush frames and write the timestamp index and header."""
+        if self.file is None:
+            return
+        self.file.close()
+        self.file = None
+        np.save(os.path.join(self.directory, SESSION_TIMESTAMPS), np.asarray(self.timestamps, dtype=np.float64))
+        header = {
+            'count': len(self.timestamps),
+            'shape': list(self.shape or (0, 0, 3)),
+            'dtype': 'uint8',
+            'fps': self.fps
+        }
+        with open(os.path.join(self.directory, SESSION_HEADER), 'w') as f:
+            json.dump(header, f)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_source(spec, fps=10.0):
+    """
+    Open a frame source from a spec string:
+    a camera index ('0'), a recorded session directory, an image directory or a video file.
+    """
+    spec = str(spec)
+    if spec.isdigit():
+        return WebcamSource(int(spec))
+    if os.path.isdir(spec):
+        if os.path.isfile(os.path.join(spec, SESSION_HEADER)):
+            return RecordedSession(spec)
+        return ImageSequenceSource(spec, fps=fps)
+    return VideoFileSource(spec)
+
+
+def paced(source, realtime=True):
+    """
+    Iterate a source, sleeping so frames are released at their recorded pace.
+    With realtime=False frames are yielded as fast as they can be read.
+    """
+    start_wall = None
+    start_ts = None
+    for timestamp, frame in source:
+        if realtime:
+            now = time.monotonic()
+            if start_wall is None:
+                start_wall, start_ts = now, timestamp
+            delay = (timestamp - start_ts) - (now - start_wall)
+            if delay > 0:
+                time.sleep(delay)
+        yield timestamp, frame
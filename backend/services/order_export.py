@@ -0,0 +1,307 @@
+"""
+Streaming export of orders to CSV, Parquet or Arrow.
+
+Orders are read with batched cursors sorted by (timestamp, order_id) and
+written out one batch at a time, so memory stays bounded regardless of the
+date range. Open and archived orders are merged in key order. An export can
+be resumed from the last exported key, formatted as 'timestamp|order_id'.
+Parquet and Arrow output need pyarrow; CSV works without it.
+
+Usage:
+    python -m backend.services.order_export --format csv --out orders.csv --start-date 2024-01-01
+    python -m backend.services.order_export --format csv --out orders.csv --resume
+    python -m backend.services.order_export --format parquet --out orders.parquet --waiter-id W1
+"""
+import argparse
+import csv
+import heapq
+import io
+import os
+import sys
+
+from pymongo import MongoClient
+
+from backend.models.order import Order
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# Number of orders per cursor batch and per written chunk / row group
+EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', '5000'))
+EXPORT_FIELDS = list(Order.__slots__) + ['archived_at']
+FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrows')
+}
+
+# MongoDB connection
+MONGO_URI = os.getenv('MONGO_URI', 'mongodb://localhost:27017')
+client = MongoClient(MONGO_URI)
+db = client['restaurant']
+orders_collection = db['orders']
+archive_collection = db['orders_archive']
+
+
+def ensure_indexes():
+    """
+    Create the (timestamp, order_id) index on open and archived orders, so the
+    export cursors stream in key order instead of sorting in memory.
+    """
+    for collection in (orders_collection, archive_collection):
+        collection.create_index([('timestamp', 1), ('order_id', 1)])
+
+
+def build_order_query(params):
+    """
+    Build the MongoDB query for the order filters shared by /orders and the export:
+    table_id, waiter_id, food_name, session_id, start_date and end_date.
+    """
+    query = {}
+    for field in ('table_id', 'waiter_id', 'food_name', 'session_id'):
+        if params.get(field):
+            query[field] = params.get(field)
+    start_date = params.get('start_date')
+    end_date = params.get('end_date')
+    if start_date or end_date:
+        query['timestamp'] = {}
+        if start_date:
+            query['timestamp']['$gte'] = start_date
+        if end_date:
+            query['timestamp']['$lte'] = end_date
+    return query
+
+
+def _sort_key(order):
+    return order.get('timestamp') or '', order.get('order_id') or ''
+
+
+def format_resume_key(order):
+    """Return the resume key of an exported order."""
+    return '|'.join(_sort_key(order))
+
+
+def parse_resume_key(value):
+    """Parse a 'timestamp|order_id' resume key, raising ValueError if malformed."""
+    timestamp, sep, order_id = (value or '').rpartition('|')
+    if not sep:
+        raise ValueError("resume key must look like 'timestamp|order_id'")
+    return timestamp, order_id
+
+
+def iter_orders(query, after=None, include_archived=True, batch_size=EXPORT_BATCH_SIZE):
+    """
+    Yield orders matching `query` in (timestamp, order_id) order, strictly after
+    the `after` key if given, merging open and archived orders.
+    """
+    if after:
+        timestamp, order_id = parse_resume_key(after)
+        query = {'$and': [query, {'$or': [
+            {'timestamp': {'$gt': timestamp}},
+            {'timestamp': timestamp, 'order_id': {'$gt': order_id}}
+        ]}]}
+    collections = [orders_collection, archive_collection] if include_archived else [orders_collection]
+    cursors = [
+        collection.find(query, {'_id': 0}).sort([('timestamp', 1), ('order_id', 1)]).batch_size(batch_size)
+        for collection in collections
+    ]
+    return heapq.merge(*cursors, key=_sort_key)
+
+
+def _batches(rows, batch_size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def iter_csv(rows, batch_size=EXPORT_BATCH_SIZE, header=True):
+    """Yield CSV text chunks, one per batch of orders."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS, extrasaction='ignore')
+    if header:
+        writer.writeheader()
+    for batch in _batches(rows, batch_size):
+        writer.writerows(batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def _arrow_schema():
+    types = {'quantity': pa.int64(), 'price': pa.float64()}
+    return pa.schema([(field, types.get(field, pa.string())) for field in EXPORT_FIELDS])
+
+
+def _record_batch(batch, schema):
+    columns = [[order.get(field) for order in batch] for field in schema.names]
+    return pa.RecordBatch.from_arrays(
+        [pa.array(column, type=field.type) for column, field in zip(columns, schema)], schema=schema
+    )
+
+
+class _StreamSink(io.RawIOBase):
+    """Write-only file object that hands written bytes back to a generator."""
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise RuntimeError('pyarrow is required for Parquet and Arrow export (pip install pyarrow)')
+
+
+def iter_parquet(rows, batch_size=EXPORT_BATCH_SIZE):
+    """Yield Parquet bytes, one row group per batch of orders."""
+    _require_pyarrow()
+    schema = _arrow_schema()
+    sink = _StreamSink()
+    writer = pq.ParquetWriter(sink, schema)
+    for batch in _batches(rows, batch_size):
+        writer.write_table(pa.Table.from_batches([_record_batch(batch, schema)]))
+        data = sink.drain()
+        if data:
+            yield data
+    writer.close()
+    yield sink.drain()
+
+
+def iter_arrow(rows, batch_size=EXPORT_BATCH_SIZE):
+    """Yield Arrow IPC stream bytes, one record batch per batch of orders."""
+    _require_pyarrow()
+    schema = _arrow_schema()
+    sink = _StreamSink()
+    writer = pa.ipc.new_stream(sink, schema)
+    for batch in _batches(rows, batch_size):
+        writer.write_batch(_record_batch(batch, schema))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+def iter_export(fmt, rows, batch_size=EXPORT_BATCH_SIZE, header=True):
+    """Yield the encoded export in the given format ('csv', 'parquet' or 'arrow')."""
+    if fmt == 'csv':
+        return iter_csv(rows, batch_size, header=header)
+    if fmt == 'parquet':
+        return iter_parquet(rows, batch_size)
+    if fmt == 'arrow':
+        return iter_arrow(rows, batch_size)
+    raise ValueError(f'Unknown export format: {fmt}')
+
+
+class _LastKey:
+    """Pass rows through while remembering the last one's resume key."""
+    def __init__(self, rows):
+        self.rows = rows
+        self.key = None
+        self.count = 0
+
+    def __iter__(self):
+        for row in self.rows:
+            self.key = format_resume_key(row)
+            self.count += 1
+            yield row
+
+
+def _resume_csv(path):
+    """
+    Prepare an existing CSV export for appending: drop a trailing partial row
+    left by an interrupted run and return the resume key of the last complete
+    row (None if only the header or nothing is left).
+    """
+    with open(path, 'r+b') as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        start = max(0, size - 64 * 1024)
+        f.seek(start)
+        tail = f.read()
+        if start:
+            # The block may begin inside a row, or inside a multibyte character
+            newline = tail.find(b'\n')
+            if newline < 0:
+                raise ValueError(f'cannot find a complete row at the end of {path}')
+            start += newline + 1
+            tail = tail[newline + 1:]
+        if not tail.endswith(b'\n'):
+            complete = tail.rfind(b'\n') + 1
+            f.truncate(start + complete)
+            tail = tail[:complete]
+    lines = tail.decode('utf-8', errors='ignore').splitlines()
+    rows = list(csv.reader(lines[-1:]))
+    if not rows or rows[0] == EXPORT_FIELDS:
+        return None
+    order = dict(zip(EXPORT_FIELDS, rows[0]))
+    return format_resume_key(order)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Export orders to CSV, Parquet or Arrow')
+    parser.add_argument('--format', choices=sorted(FORMATS), default='csv')
+    parser.add_argument('--out', required=True, help='output file')
+    parser.add_argument('--table-id')
+    parser.add_argument('--waiter-id')
+    parser.add_argument('--food-name')
+    parser.add_argument('--session-id')
+    parser.add_argument('--start-date', help='ISO timestamp, inclusive')
+    parser.add_argument('--end-date', help='ISO timestamp, inclusive')
+    parser.add_argument('--after', help="resume after this 'timestamp|order_id' key")
+    parser.add_argument('--resume', action='store_true', help='append to an existing CSV after its last row')
+    parser.add_argument('--open-only', action='store_true', help='skip archived orders')
+    parser.add_argument('--batch-size', type=int, default=EXPORT_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    after = args.after
+    mode = 'wb'
+    header = True
+    if args.resume:
+        if args.format != 'csv':
+            parser.error('--resume only works with CSV; use --after with the key printed by the last run')
+        if os.path.exists(args.out) and os.path.getsize(args.out):
+            key = _resume_csv(args.out)
+            if os.path.getsize(args.out):
+                after = key or after
+                mode = 'ab'
+                header = False
+    ensure_indexes()
+    rows = _LastKey(iter_orders(build_order_query(vars(args)), after=after,
+                                include_archived=not args.open_only, batch_size=args.batch_size))
+    with open(args.out, mode) as f:
+        for chunk in iter_export(args.format, rows, args.batch_size, header=header):
+            f.write(chunk.encode('utf-8') if isinstance(chunk, str) else chunk)
+    print(f'Exported {rows.count} orders to {args.out}')
+    if rows.key:
+        print(f'Last key: {rows.key}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
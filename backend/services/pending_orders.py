@@ -0,0 +1,130 @@
+"""
+Thread-safe store of camera-detected orders awaiting confirmation.
+
+Pending orders are keyed by table and dish, so each table can have its own
+unconfirmed detections without blocking the rest of the restaurant.
+Repeated detections of the same dish at the same table are merged into one
+entry, entries expire after a TTL, and a confirmed or rejected dish is
+ignored for a short cooldown so the camera does not re-propose it at once.
+"""
+import datetime
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+# Seconds an unconfirmed detection stays pending
+PENDING_ORDER_TTL = float(os.getenv('PENDING_ORDER_TTL', '120'))
+# Seconds a confirmed/rejected dish is ignored for the same table
+PENDING_ORDER_COOLDOWN = float(os.getenv('PENDING_ORDER_COOLDOWN', '10'))
+
+
+class PendingOrderStore:
+    """
+    Pending orders keyed by table_id, then food_name.
+    `clock` returns seconds and can be replaced (e.g. by frame timestamps during replay).
+    """
+    def __init__(self, ttl=PENDING_ORDER_TTL, cooldown=PENDING_ORDER_COOLDOWN, clock=time.monotonic):
+        self.ttl = ttl
+        self.cooldown = cooldown
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._tables = {}
+        self._cooldowns = {}
+
+    def _expire(self, now):
+        """Drop expired entries and cooldowns. Caller holds the lock."""
+        for table_id in list(self._tables):
+            dishes = self._tables[table_id]
+            for food_name in [f for f, e in dishes.items() if now - e['_created'] >= self.ttl]:
+                del dishes[food_name]
+            if not dishes:
+                del self._tables[table_id]
+        for key in [k for k, until in self._cooldowns.items() if until <= now]:
+            del self._cooldowns[key]
+
+    def add(self, table_id, waiter_id, food_name, confidence, build):
+        """
+        Record a detection. `build()` returns the order fields (e.g. with price)
+        and is only called for a new entry. Returns (entry, created), or
+        (None, False) while the dish is cooling down for this table.
+        """
+        key = (table_id, food_name)
+        with self._lock:
+            now = self.clock()
+            self._expire(now)
+            if key in self._cooldowns:
+                return None, False
+            entry = self._tables.get(table_id, {}).get(food_name)
+            if entry is not None:
+                entry['detections'] += 1
+                entry['confidence'] = max(entry['confidence'], confidence)
+                entry['waiter_id'] = waiter_id
+                return _public(entry), False
+        # Build outside the lock: it may query the database
+        fields = build()
+        with self._lock:
+            dishes = self._tables.setdefault(table_id, OrderedDict())
+            entry = dishes.get(food_name)
+            if entry is not None:
+                entry['detections'] += 1
+                return _public(entry), False
+            entry = {
+                **fields,
+                'pending_id': str(uuid.uuid4()),
+                'table_id': table_id,
+                'waiter_id': waiter_id,
+                'food_name': food_name,
+                'confidence': confidence,
+                'detections': 1,
+                'timestamp': fields.get('timestamp') or datetime.datetime.now().isoformat(),
+                '_created': self.clock()
+            }
+            dishes[food_name] = entry
+            return _public(entry), True
+
+    def list(self, table_id=None):
+        """Return pending orders (oldest first), optionally for one table."""
+        with self._lock:
+            self._expire(self.clock())
+            tables = [self._tables.get(table_id, {})] if table_id else self._tables.values()
+            entries = [e for dishes in tables for e in dishes.values()]
+        entries.sort(key=lambda e: e['_created'])
+        return [_public(e) for e in entries]
+
+    def pop(self, pending_ids=None, table_id=None, everything=False):
+        """
+        Remove and return pending orders by ID, by table, or all of them.
+        With no selector, removes only the oldest one. Removed dishes start their cooldown.
+        """
+        with self._lock:
+            now = self.clock()
+            self._expire(now)
+            entries = [e for dishes in self._tables.values() for e in dishes.values()]
+            if pending_ids:
+                wanted = set(pending_ids)
+                selected = [e for e in entries if e['pending_id'] in wanted]
+            elif table_id:
+                selected = [e for e in entries if e['table_id'] == table_id]
+            elif everything:
+                selected = entries
+            else:
+                selected = sorted(entries, key=lambda e: e['_created'])[:1]
+            for entry in selected:
+                dishes = self._tables[entry['table_id']]
+                del dishes[entry['food_name']]
+                if not dishes:
+                    del self._tables[entry['table_id']]
+                self._cooldowns[(entry['table_id'], entry['food_name'])] = now + self.cooldown
+        selected.sort(key=lambda e: e['_created'])
+        return [_public(e) for e in selected]
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(dishes) for dishes in self._tables.values())
+
+
+def _public(entry):
+    """Copy of an entry without internal bookkeeping fields."""
+    return {k: v for k, v in entry.items() if not k.startswith('_')}
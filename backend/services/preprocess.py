@@ -0,0 +1,94 @@
+"""
+Zero-copy preprocessing of OpenCV frames for the food classifiers.
+
+FramePreprocessor goes straight from a BGR uint8 numpy frame to a normalized
+float32 NCHW tensor:
+    - the optional center-crop ROI is a numpy view (no copy),
+    - one cv2.resize writes into a preallocated uint8 buffer,
+    - one fused pass per channel scales, normalizes and swaps BGR->RGB into a
+      preallocated float32 buffer that the returned torch tensor shares.
+After the first call no per-frame buffers are allocated. The returned tensor
+is overwritten by the next call, so consume it before preprocessing again.
+"""
+import contextlib
+import threading
+
+import cv2
+import numpy as np
+import torch
+
+IMAGENET_MEAN = (0.485, 0.456, 0.406)
+IMAGENET_STD = (0.229, 0.224, 0.225)
+
+
+class FramePreprocessor:
+    """
+    Converts BGR uint8 frames to a (1, 3, size, size) float32 RGB tensor
+    computed as (pixel / 255 - mean) / std, reusing its buffers.
+    crop: None to stretch the whole frame, or the fraction of the shorter
+    side to keep as a centered square ROI (1.0 = largest centered square).
+    """
+    def __init__(self, size=224, mean=(0.0, 0.0, 0.0), std=(1.0, 1.0, 1.0), crop=None):
+        if crop is not None and not 0 < crop <= 1:
+            raise ValueError('crop must be in (0, 1]')
+        self.size = size
+        self.crop = crop
+        std = np.asarray(std, dtype=np.float32)
+        # (pixel / 255 - mean) / std == pixel * scale + offset
+        self._scale = (1.0 / (255.0 * std)).astype(np.float32)
+        self._offset = (-np.asarray(mean, dtype=np.float32) / std).astype(np.float32)
+        self._resized = np.empty((size, size, 3), dtype=np.uint8)
+        self._input = np.empty((1, 3, size, size), dtype=np.float32)
+        self.tensor = torch.from_numpy(self._input)
+
+    def roi(self, frame):
+        """Return the centered crop region of the frame as a view."""
+        if self.crop is None:
+            return frame
+        height, width = frame.shape[:2]
+        side = max(1, int(min(height, width) * self.crop))
+        top = (height - side) // 2
+        left = (width - side) // 2
+        return frame[top:top + side, left:left + side]
+
+    def __call__(self, frame):
+        """Preprocess one BGR uint8 frame and return the shared input tensor."""
+        roi = self.roi(frame)
+        shrinking = roi.shape[0] > self.size or roi.shape[1] > self.size
+        cv2.resize(roi, (self.size, self.size), dst=self._resized,
+                   interpolation=cv2.INTER_AREA if shrinking else cv2.INTER_LINEAR)
+        for c in range(3):
+            # RGB channel c is read from BGR channel 2 - c: the channel swap is free
+            out = self._input[0, c]
+            np.multiply(self._resized[:, :, 2 - c], self._scale[c], out=out, dtype=np.float32)
+            np.add(out, self._offset[c], out=out)
+        return self.tensor
+
+
+class PreprocessorPool:
+    """
+    Lends FramePreprocessors to callers, so buffers are reused across threads
+    too: werkzeug serves each request on a new thread, so per-thread buffers
+    would be reallocated on every camera upload. The pool grows to the peak
+    number of concurrent callers. Keep the lease until the returned tensor
+    has been consumed:
+
+        with pool.acquire() as preprocess:
+            outputs = model(preprocess(frame))
+    """
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self._lock = threading.Lock()
+        self._free = []
+
+    @contextlib.contextmanager
+    def acquire(self):
+        with self._lock:
+            preprocessor = self._free.pop() if self._free else None
+        if preprocessor is None:
+            preprocessor = FramePreprocessor(**self.kwargs)
+        try:
+            yield preprocessor
+        finally:
+            with self._lock:
+                self._free.append(preprocessor)
@@ -0,0 +1,126 @@
+"""
+Table sessions: one document per seating with a running bill.
+
+Orders reference the session of their table, and the session keeps
+bill_total and order_count up to date, so the current bill is two key
+lookups instead of a scan over the table's orders. Resetting a table
+closes its session and moves its orders to the orders_archive collection,
+keeping revenue history available to reports.
+"""
+import datetime
+import os
+import uuid
+
+from pymongo import MongoClient
+from pymongo.errors import BulkWriteError
+
+from backend.models.table_session import TableSession
+
+# MongoDB connection
+MONGO_URI = os.getenv('MONGO_URI', 'mongodb://localhost:27017')
+client = MongoClient(MONGO_URI)
+db = client['restaurant']
+tables_collection = db['tables']
+orders_collection = db['orders']
+archive_collection = db['orders_archive']
+sessions_collection = db['table_sessions']
+
+
+def ensure_indexes():
+    """
+    Create the indexes session lookups rely on: sessions by ID on every order
+    and bill, orders by table on reset, archived orders by session.
+    """
+    sessions_collection.create_index('session_id', unique=True)
+    orders_collection.create_index('table_id')
+    archive_collection.create_index('session_id')
+
+
+def open_session(table_id, waiter_id=None):
+    """
+    Return the table's open session ID, opening a new session if it has none.
+    Returns None if the table does not exist.
+    """
+    table = tables_collection.find_one({'table_id': table_id}, {'session_id': 1, 'waiter_id': 1})
+    if not table:
+        return None
+    if table.get('session_id'):
+        return table['session_id']
+    session = TableSession(
+        session_id=str(uuid.uuid4()),
+        table_id=table_id,
+        waiter_id=waiter_id or table.get('waiter_id'),
+        opened_at=datetime.datetime.now().isoformat()
+    )
+    # Only one concurrent caller can attach its session to the table
+    claimed = tables_collection.update_one({'table_id': table_id, 'session_id': None},
+                                           {'$set': {'session_id': session.session_id}})
+    if not claimed.modified_count:
+        table = tables_collection.find_one({'table_id': table_id}, {'session_id': 1})
+        return table.get('session_id') if table else None
+    fields = session.to_dict()
+    # Upsert: record_order may already have created the document for this session
+    for key in ('bill_total', 'order_count'):
+        fields.pop(key)
+    sessions_collection.update_one({'session_id': session.session_id}, {'$setOnInsert': fields}, upsert=True)
+    return session.session_id
+
+
+def record_order(order_doc):
+    """
+    Insert an order into the table's open session and add it to the running bill.
+    Returns the inserted order dict (with session_id set).
+    """
+    table_id = order_doc.get('table_id')
+    session_id = open_session(table_id, order_doc.get('waiter_id')) if table_id else None
+    order_doc['session_id'] = session_id
+    orders_collection.insert_one(order_doc)
+    order_doc.pop('_id', None)
+    if session_id:
+        sessions_collection.update_one(
+            {'session_id': session_id},
+            {
+                '$inc': {'bill_total': float(order_doc.get('price') or 0), 'order_count': 1},
+                '$setOnInsert': {'table_id': table_id, 'status': 'open'}
+            },
+            upsert=True
+        )
+    return order_doc
+
+
+def close_session(table_id):
+    """
+    Close the table's open session and move its orders to the archive in bulk.
+    Returns (number of orders archived, closed session dict or None).
+    """
+    table = tables_collection.find_one({'table_id': table_id}, {'session_id': 1})
+    session_id = table.get('session_id') if table else None
+    now = datetime.datetime.now().isoformat()
+    # Orders of the current seating, including ones saved before sessions existed
+    orders = list(orders_collection.find({'table_id': table_id}))
+    if orders:
+        for order in orders:
+            order['archived_at'] = now
+        try:
+            archive_collection.insert_many(orders, ordered=False)
+        except BulkWriteError as e:
+            # Orders already archived by an interrupted reset are fine; anything else is not
+            if any(error.get('code') != 11000 for error in e.details.get('writeErrors', [])):
+                raise
+        orders_collection.delete_many({'_id': {'$in': [order['_id'] for order in orders]}})
+    session = None
+    if session_id:
+        sessions_collection.update_one({'session_id': session_id}, {'$set': {'status': 'closed', 'closed_at': now}})
+        session = sessions_collection.find_one({'session_id': session_id}, {'_id': 0})
+    tables_collection.update_one({'table_id': table_id}, {'$set': {'session_id': None}})
+    return len(orders), session
+
+
+def get_current_bill(table_id):
+    """
+    Return the open session of a table (bill_total, order_count, ...), or None.
+    """
+    table = tables_collection.find_one({'table_id': table_id}, {'session_id': 1})
+    if not table or not table.get('session_id'):
+        return None
+    return sessions_collection.find_one({'session_id': table['session_id']}, {'_id': 0})
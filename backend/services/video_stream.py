@@ -2,36 +2,23 @@ import cv2
 from pyzbar import pyzbar
 import numpy as np
 import torch
-import torchvision.transforms as T
-from PIL import Image
 import datetime
 from pymongo import MongoClient
 import os
 import uuid
+import time
+from backend.utils.cache import bump
+from backend.services.frame_sources import open_source, paced
+from backend.services.pending_orders import PendingOrderStore
+from backend.services.table_sessions import record_order
+from backend.services.waiter_scoring import scoreboard, response_delay
+from backend.services.preprocess import PreprocessorPool, IMAGENET_MEAN, IMAGENET_STD
+from backend.services.food_classifier import FOOD_CLASSES, predict_food_yolov8
 
 # Global state variables for camera and prediction
-last_qr_data = None  # Last scanned QR code or number
-last_food_pred = None  # Last predicted food
-pending_order = None  # Last detected and pending order
 CONFIDENCE_THRESHOLD = 0.5  # Confidence threshold for predictions
-
-# Load Food-101 class names
-FOOD_CLASSES = [
-    'apple_pie', 'baby_back_ribs', 'baklava', 'beef_carpaccio', 'beef_tartare', 'beet_salad', 'beignets',
-    'bibimbap', 'bread_pudding', 'breakfast_burrito', 'bruschetta', 'caesar_salad', 'cannoli', 'caprese_salad',
-    'carrot_cake', 'ceviche', 'cheesecake', 'cheese_plate', 'chicken_curry', 'chicken_quesadilla', 'chicken_wings',
-    'chocolate_cake', 'chocolate_mousse', 'churros', 'clam_chowder', 'club_sandwich', 'crab_cakes', 'creme_brulee',
-    'croque_madame', 'cup_cakes', 'deviled_eggs', 'donuts', 'dumplings', 'edamame', 'eggs_benedict', 'escargots',
-    'falafel', 'filet_mignon', 'fish_and_chips', 'foie_gras', 'french_fries', 'french_onion_soup', 'french_toast',
-    'fried_calamari', 'fried_rice', 'frozen_yogurt', 'garlic_bread', 'gnocchi', 'greek_salad', 'grilled_cheese_sandwich',
-    'grilled_salmon', 'guacamole', 'gyoza', 'hamburger', 'hot_and_sour_soup', 'hot_dog', 'huevos_rancheros', 'hummus',
-    'ice_cream', 'lasagna', 'lobster_bisque', 'lobster_roll_sandwich', 'macaroni_and_cheese', 'macarons', 'miso_soup',
-    'mussels', 'nachos', 'omelette', 'onion_rings', 'oysters', 'pad_thai', 'paella', 'pancakes', 'panna_cotta',
-    'peking_duck', 'pho', 'pizza', 'pork_chop', 'poutine', 'prime_rib', 'pulled_pork_sandwich', 'ramen', 'ravioli',
-    'red_velvet_cake', 'risotto', 'samosa', 'sashimi', 'scallops', 'seaweed_salad', 'shrimp_and_grits', 'spaghetti_bolognese',
-    'spaghetti_carbonara', 'spring_rolls', 'steak', 'strawberry_shortcake', 'sushi', 'tacos', 'takoyaki', 'tiramisu',
-    'tuna_tartare', 'waffles'
-]
+# Frame source for the live stream: camera index, video file, image directory or recorded session
+VIDEO_SOURCE = os.getenv('VIDEO_SOURCE', '0')
 
 MODEL_PATH = 'food101_mobilenetv2_small.pt'
 model = None
@@ -45,13 +32,8 @@ except FileNotFoundError:
     print(f"WARNING: Model file not found, prediction function is disabled.")
     model = None
 
-# Image transformation pipeline for model input
-transform = T.Compose([
-    T.ToPILImage(),
-    T.Resize((224, 224)),
-    T.ToTensor(),
-    T.Normalize([0.485, 0.456, 0.406], [0.229, 0.224, 0.225])
-])
+# Model input: BGR frame -> 224x224 ImageNet-normalized RGB tensor, reusing pooled buffers
+preprocess = PreprocessorPool(size=224, mean=IMAGENET_MEAN, std=IMAGENET_STD)
 
 def predict_food(frame):
     """
@@ -60,47 +42,12 @@ def predict_food(frame):
     """
     if model is None:
         return 'unknown'
-    img = transform(frame)
-    img = img.unsqueeze(0)
-    with torch.no_grad():
-        outputs = model(img)
+    with preprocess.acquire() as preprocessor, torch.no_grad():
+        outputs = model(preprocessor(frame))
         _, predicted = torch.max(outputs, 1)
         class_idx = predicted.item()
     return FOOD_CLASSES[class_idx]
 
-# YOLOv8-based Food101 classifier (ultralytics)
-try:
-    from ultralytics import YOLO
-    YOLOV8_MODEL_PATH = os.path.join(os.path.dirname(__file__), '..', 'food101_yolov8_cls.pt')
-    yolov8_model = YOLO(YOLOV8_MODEL_PATH)
-except Exception as e:
-    print(f"WARNING: YOLOv8 model could not be loaded: {e}")
-    yolov8_model = None
-
-def predict_food_yolov8(image):
-    """
-    Predict the food class using YOLOv8 model.
-    Args:
-        image: numpy array (BGR, OpenCV)
-    Returns:
-        predicted class name (str), confidence (float)
-    """
-    if yolov8_model is None:
-        print('YOLOv8 model not loaded!')
-        return 'unknown', 0.0
-    img_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-    pil_img = Image.fromarray(img_rgb)
-    results = yolov8_model(pil_img)
-    result = results[0] if isinstance(results, (list, tuple)) else results
-    class_idx = None
-    confidence = 0.0
-    if hasattr(result, 'probs') and result.probs is not None:
-        class_idx = int(result.probs.top1)
-        confidence = float(result.probs.data[class_idx])
-    if class_idx is not None and 0 <= class_idx < len(FOOD_CLASSES):
-        return FOOD_CLASSES[class_idx], confidence
-    return 'unknown', 0.0
-
 # MongoDB connection
 MONGO_URI = os.getenv('MONGO_URI', 'mongodb://localhost:27017')
 client = MongoClient(MONGO_URI)
@@ -121,119 +68,202 @@ def create_order(table_id, waiter_id, food_name, price):
         'price': price,
         'timestamp': datetime.datetime.now().isoformat()
     }
-    orders_collection.insert_one(order_doc)
-    waiters_collection.update_one({'waiter_id': waiter_id}, {'$inc': {'performance': 1}})
+    record_order(order_doc)
+    scoreboard.order(waiter_id)
     # Handle waiter delay penalty if applicable
     if table_id:
         tables_collection = db['tables']
         table_doc = tables_collection.find_one({'table_id': table_id})
         now = datetime.datetime.now()
-        last_customer_time = table_doc.get('last_customer_time')
-        last_waiter_time = table_doc.get('last_waiter_time')
-        if last_customer_time and (not last_waiter_time or last_waiter_time < last_customer_time):
-            t_customer = datetime.datetime.fromisoformat(last_customer_time)
-            delay = (now - t_customer).total_seconds()
+        delay = response_delay(table_doc, now)
+        if delay is not None:
+            scoreboard.response(waiter_id, delay)
             if delay > 120:
-                waiters_collection.update_one({'waiter_id': waiter_id}, {'$inc': {'performance': -1}})
+                scoreboard.penalty(waiter_id)
             tables_collection.update_one({'table_id': table_id}, {'$set': {'last_waiter_time': now.isoformat()}})
+    bump('orders', 'tables')
 
-def gen_frames():
+class FramePipeline:
     """
-    Generator function for real-time video streaming with QR and food detection overlays.
-    Yields JPEG frames for HTTP streaming.
-    """
-    global last_qr_data, last_food_pred, pending_order
-    cap = cv2.VideoCapture(0)
-    while True:
-        success, frame = cap.read()
-        if not success:
-            break
+    QR + food detection over a stream of frames.
+    Calls on_candidate(table_id, waiter_id, food_name, confidence) for every frame
+    that would produce an order, and keeps its own last QR / food state.
+    """
+    def __init__(self, on_candidate):
+        self.on_candidate = on_candidate
+        self.last_qr_data = None  # Last scanned QR code or number
+        self.last_food_pred = None  # Last predicted food
+
+    def process(self, frame, annotate=True):
+        """
+        Run detection on one BGR frame. With annotate=True, overlays are drawn in place.
+        """
         # Decode QR codes in the frame
         decoded_objs = pyzbar.decode(frame)
         for obj in decoded_objs:
             qr_data = obj.data.decode('utf-8')
-            if last_qr_data != qr_data:
-                last_qr_data = qr_data
-            points = obj.polygon
-            if len(points) > 4: points = points[:4]
-            pts = [(pt.x, pt.y) for pt in points]
-            cv2.polylines(frame, [np.array(pts, np.int32)], True, (0,255,0), 2)
-            cv2.putText(frame, qr_data, (pts[0][0], pts[0][1]-10), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0,255,0), 2)
+            if self.last_qr_data != qr_data:
+                self.last_qr_data = qr_data
+            if annotate:
+                points = obj.polygon
+                if len(points) > 4: points = points[:4]
+                pts = [(pt.x, pt.y) for pt in points]
+                cv2.polylines(frame, [np.array(pts, np.int32)], True, (0,255,0), 2)
+                cv2.putText(frame, qr_data, (pts[0][0], pts[0][1]-10), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0,255,0), 2)
         try:
             # Predict food in the frame
             food_pred, confidence = predict_food_yolov8(frame)
-            last_food_pred = food_pred
-            cv2.putText(frame, f'Food: {food_pred} ({confidence:.2f})', (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (255,0,0), 2)
-            # Only create pending_order if none exists and confidence is high
-            if pending_order is None and last_qr_data and last_food_pred and confidence >= CONFIDENCE_THRESHOLD:
+            self.last_food_pred = food_pred
+            if annotate:
+                cv2.putText(frame, f'Food: {food_pred} ({confidence:.2f})', (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (255,0,0), 2)
+            if self.last_qr_data and self.last_food_pred and confidence >= CONFIDENCE_THRESHOLD:
                 # QR code must be in 'table_id|waiter_id' format
-                if '|' in last_qr_data:
-                    parts = last_qr_data.split('|')
+                if '|' in self.last_qr_data:
+                    parts = self.last_qr_data.split('|')
                     if len(parts) == 2 and parts[0] and parts[1]:
-                        table_id, waiter_id = parts[0], parts[1]
-                        food_doc = foods_collection.find_one({'name': last_food_pred})
-                        price = food_doc['price'] if food_doc and 'price' in food_doc else None
-                        pending_order = {
-                            'table_id': table_id,
-                            'waiter_id': waiter_id,
-                            'food_name': last_food_pred,
-                            'price': price,
-                            'confidence': confidence,
-                            'timestamp': datetime.datetime.now().isoformat()
-                        }
-                        print("pending_order created:", last_food_pred, confidence, last_qr_data)
-                # Otherwise, do not create pending_order
+                        self.on_candidate(parts[0], parts[1], self.last_food_pred, confidence)
+                # Otherwise, do not create an order candidate
         except Exception as e:
-            cv2.putText(frame, 'Food: ?', (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (0,0,255), 2)
-        ret, buffer = cv2.imencode('.jpg', frame)
-        frame = buffer.tobytes()
-        yield (b'--frame\r\n'
-               b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n')
-    cap.release()
+            if annotate:
+                cv2.putText(frame, 'Food: ?', (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (0,0,255), 2)
+        return frame
+
+def build_pending_order(table_id, waiter_id, food_name, confidence):
+    """
+    Build a pending order document, looking up the food price.
+    """
+    food_doc = foods_collection.find_one({'name': food_name})
+    price = food_doc['price'] if food_doc and 'price' in food_doc else None
+    return {
+        'table_id': table_id,
+        'waiter_id': waiter_id,
+        'food_name': food_name,
+        'price': price,
+        'confidence': confidence,
+        'timestamp': datetime.datetime.now().isoformat()
+    }
+
+# Camera-detected orders awaiting confirmation, keyed by table
+pending_orders = PendingOrderStore()
+
+def _on_live_candidate(table_id, waiter_id, food_name, confidence):
+    """Add or refresh the pending order for this table and dish."""
+    _, created = pending_orders.add(
+        table_id, waiter_id, food_name, confidence,
+        lambda: build_pending_order(table_id, waiter_id, food_name, confidence)
+    )
+    if created:
+        print("pending_order created:", food_name, confidence, f'{table_id}|{waiter_id}')
+
+live_pipeline = FramePipeline(_on_live_candidate)
+
+def gen_frames(source=None):
+    """
+    Generator function for real-time video streaming with QR and food detection overlays.
+    Reads from `source` (default: VIDEO_SOURCE) and yields JPEG frames for HTTP streaming.
+    """
+    source = source or open_source(VIDEO_SOURCE)
+    try:
+        for _, frame in paced(source, realtime=True):
+            if not frame.flags.writeable:
+                frame = frame.copy()
+            frame = live_pipeline.process(frame)
+            ret, buffer = cv2.imencode('.jpg', frame)
+            frame = buffer.tobytes()
+            yield (b'--frame\r\n'
+                   b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n')
+    finally:
+        source.close()
+
+def replay(source, realtime=False, max_frames=None):
+    """
+    Run the detection pipeline over a frame source without touching live state.
+    Detections go through a private pending-order store clocked by frame
+    timestamps, and every pending entry is treated as confirmed. Returns a
+    report dict with frames/sec and the orders that would have been created.
+    """
+    orders = {}
+    frame_time = [0.0]
+    store = PendingOrderStore(clock=lambda: frame_time[0])
+    def on_candidate(table_id, waiter_id, food_name, confidence):
+        entry, _ = store.add(
+            table_id, waiter_id, food_name, confidence,
+            lambda: build_pending_order(table_id, waiter_id, food_name, confidence)
+        )
+        if entry is not None:
+            orders[entry['pending_id']] = entry
+    pipeline = FramePipeline(on_candidate)
+    frames = 0
+    start = time.perf_counter()
+    try:
+        for timestamp, frame in paced(source, realtime=realtime):
+            frame_time[0] = timestamp
+            pipeline.process(frame, annotate=False)
+            frames += 1
+            if max_frames and frames >= max_frames:
+                break
+    finally:
+        source.close()
+    elapsed = time.perf_counter() - start
+    return {
+        'frames': frames,
+        'elapsed_s': elapsed,
+        'fps': frames / elapsed if elapsed else 0.0,
+        'realtime': realtime,
+        'orders': list(orders.values())
+    }
 
 from flask import jsonify
 
 def get_pending_order():
     """
-    Return the current pending order as a JSON response.
+    Return pending orders as a JSON response, optionally filtered by ?table_id=.
+    'pending_order' holds the oldest one for single-order clients.
     """
-    global pending_order
-    return jsonify({'pending_order': pending_order})
+    orders = pending_orders.list(request.args.get('table_id'))
+    return jsonify({'pending_order': orders[0] if orders else None, 'pending_orders': orders})
 
 from flask import request
 
+def _pop_requested():
+    """
+    Remove the pending orders selected by the request body:
+    {'pending_ids': [...]}, {'pending_id': ...}, {'table_id': ...} or {'all': true}.
+    An empty body selects the oldest pending order.
+    """
+    data = request.get_json(silent=True) or {}
+    pending_ids = data.get('pending_ids') or ([data['pending_id']] if data.get('pending_id') else None)
+    return pending_orders.pop(pending_ids=pending_ids, table_id=data.get('table_id'), everything=bool(data.get('all')))
+
 def confirm_pending_order():
     """
-    Confirm and save the pending order, then clear it.
+    Confirm and save the selected pending orders, then clear them.
     """
-    global pending_order
-    if not pending_order or not pending_order.get('table_id') or not pending_order.get('waiter_id'):
+    confirmed = _pop_requested()
+    if not confirmed:
         return jsonify({'error': 'No pending order or missing table/waiter info'}), 400
-    create_order(
-        pending_order['table_id'],
-        pending_order['waiter_id'],
-        pending_order['food_name'],
-        pending_order['price']
-    )
-    pending_order = None
-    return jsonify({'message': 'Order added'})
+    for order in confirmed:
+        create_order(order['table_id'], order['waiter_id'], order['food_name'], order['price'])
+    return jsonify({
+        'message': 'Order added' if len(confirmed) == 1 else f'{len(confirmed)} orders added',
+        'confirmed': [order['pending_id'] for order in confirmed]
+    })
 
 def reject_pending_order():
     """
-    Reject and clear the current pending order.
+    Reject and clear the selected pending orders.
     """
-    global pending_order
-    pending_order = None
-    return jsonify({'message': 'Pending order cancelled'})
+    rejected = _pop_requested()
+    return jsonify({'message': 'Pending order cancelled', 'rejected': [order['pending_id'] for order in rejected]})
 
 def get_last_qr_data():
     """
     Return the last scanned QR code data.
     """
-    return last_qr_data
+    return live_pipeline.last_qr_data
 
 def get_last_food_pred():
     """
     Return the last predicted food name.
     """
-    return last_food_pred 
\ No newline at end of file
+    return live_pipeline.last_food_pred 
\ No newline at end of file
@@ -0,0 +1,282 @@
+"""
+Live waiter scoring: performance, interest level and a top-K leaderboard.
+
+Routes report order, served, response and delay-penalty events here instead
+of issuing their own $inc updates. The scoreboard applies them in memory
+under a lock, keeps rolling one-hour windows (orders per hour, average
+response delay since the customer sat down) and rebuilds a sorted top-K
+snapshot on every write, so reading the leaderboard is constant time.
+Accumulated deltas are checkpointed to MongoDB with one bulk_write every
+WAITER_CHECKPOINT_INTERVAL seconds.
+
+State is per process and seeded lazily from the waiters collection; run a
+single backend worker, or accept that each worker ranks its own events.
+"""
+import atexit
+import datetime
+import heapq
+import os
+import threading
+import time
+from collections import deque
+
+from pymongo import MongoClient, UpdateOne
+
+from backend.utils.cache import bump
+
+# Seconds between flushes of accumulated score deltas to MongoDB
+WAITER_CHECKPOINT_INTERVAL = float(os.getenv('WAITER_CHECKPOINT_INTERVAL', '5'))
+# Number of waiters kept in the leaderboard snapshot
+LEADERBOARD_SIZE = int(os.getenv('LEADERBOARD_SIZE', '10'))
+# Length of the rolling metric windows in seconds
+SCORING_WINDOW = 3600
+
+# MongoDB connection
+MONGO_URI = os.getenv('MONGO_URI', 'mongodb://localhost:27017')
+client = MongoClient(MONGO_URI)
+db = client['restaurant']
+waiters_collection = db['waiters']
+
+_PROJECTION = {'_id': 0, 'waiter_id': 1, 'name': 1, 'performance': 1, 'interest_level': 1}
+
+
+def response_delay(table, now=None):
+    """
+    Seconds between the table's last_customer_time and now, or None if the
+    table has already been served since the customer sat down.
+    """
+    last_customer_time = (table or {}).get('last_customer_time')
+    last_waiter_time = (table or {}).get('last_waiter_time')
+    if not last_customer_time or (last_waiter_time and last_waiter_time >= last_customer_time):
+        return None
+    now = now or datetime.datetime.now()
+    return (now - datetime.datetime.fromisoformat(last_customer_time)).total_seconds()
+
+
+class _WaiterScore:
+    """In-memory score and rolling windows of one waiter."""
+    __slots__ = ('waiter_id', 'name', 'performance', 'interest_level', 'orders', 'delays', 'delay_sum')
+
+    @classmethod
+    def from_doc(cls, doc):
+        return cls(doc['waiter_id'], doc.get('name'), doc.get('performance') or 0, doc.get('interest_level') or 0)
+
+    def __init__(self, waiter_id, name=None, performance=0, interest_level=0):
+        self.waiter_id = waiter_id
+        self.name = name
+        self.performance = performance
+        self.interest_level = interest_level
+        self.orders = deque()   # timestamps of recent orders
+        self.delays = deque()   # (timestamp, seconds) of recent responses
+        self.delay_sum = 0.0
+
+    def prune(self, cutoff):
+        while self.orders and self.orders[0] < cutoff:
+            self.orders.popleft()
+        while self.delays and self.delays[0][0] < cutoff:
+            self.delay_sum -= self.delays.popleft()[1]
+
+    def rank_key(self):
+        return self.performance, self.interest_level, len(self.orders)
+
+    def to_dict(self, window):
+        return {
+            'waiter_id': self.waiter_id,
+            'name': self.name,
+            'performance': self.performance,
+            'interest_level': self.interest_level,
+            'orders_per_hour': len(self.orders) * 3600 / window,
+            'avg_response_delay': round(self.delay_sum / len(self.delays), 1) if self.delays else None
+        }
+
+
+class WaiterScoreboard:
+    """
+    Thread-safe waiter scores with a top-K leaderboard.
+    collection: the waiters collection used for seeding and checkpoints.
+    clock: returns the current time in seconds (injectable for replays).
+    """
+    def __init__(self, collection, top_k=LEADERBOARD_SIZE, window=SCORING_WINDOW,
+                 checkpoint_interval=WAITER_CHECKPOINT_INTERVAL, clock=time.time):
+        self.collection = collection
+        self.top_k = top_k
+        self.window = window
+        self.checkpoint_interval = checkpoint_interval
+        self.clock = clock
+        self._lock = threading.Lock()
+        # Held while deltas are written, so absolute updates never interleave with a flush
+        self._flush_lock = threading.Lock()
+        self._scores = None
+        self._pending = {}
+        self._snapshot = []
+        self._snapshot_time = 0
+        self._thread = None
+
+    def _ensure_loaded(self):
+        """Seed scores from MongoDB on first use. Caller holds the lock."""
+        if self._scores is not None:
+            return
+        self._scores = {}
+        for doc in self.collection.find({}, _PROJECTION):
+            if doc.get('waiter_id'):
+                self._scores[doc['waiter_id']] = _WaiterScore.from_doc(doc)
+        self._rebuild()
+
+    def _lookup(self, waiter_id):
+        """
+        Return the score of an existing waiter, or None for unknown IDs.
+        Waiters created by another process are read from MongoDB on first use.
+        """
+        if not waiter_id:
+            return None
+        with self._lock:
+            self._ensure_loaded()
+            score = self._scores.get(waiter_id)
+        if score is not None:
+            return score
+        doc = self.collection.find_one({'waiter_id': waiter_id}, _PROJECTION)
+        if not doc:
+            return None
+        with self._lock:
+            return self._scores.setdefault(waiter_id, _WaiterScore.from_doc(doc))
+
+    def _rebuild(self):
+        """Recompute the top-K snapshot. Caller holds the lock."""
+        now = self.clock()
+        cutoff = now - self.window
+        for score in self._scores.values():
+            score.prune(cutoff)
+        top = heapq.nlargest(self.top_k, self._scores.values(), key=_WaiterScore.rank_key)
+        self._snapshot = [score.to_dict(self.window) for score in top]
+        self._snapshot_time = now
+
+    def _apply(self, waiter_id, performance=0, interest_level=0, order=False, delay=None):
+        """Apply one event. Events for unknown waiters are ignored; returns whether it was applied."""
+        score = self._lookup(waiter_id)
+        if score is None:
+            return False
+        self._start()
+        with self._lock:
+            now = self.clock()
+            score.performance += performance
+            score.interest_level += interest_level
+            if order:
+                score.orders.append(now)
+            if delay is not None:
+                score.delays.append((now, delay))
+                score.delay_sum += delay
+            if performance or interest_level:
+                pending = self._pending.setdefault(waiter_id, {'performance': 0, 'interest_level': 0})
+                pending['performance'] += performance
+                pending['interest_level'] += interest_level
+            self._rebuild()
+        return True
+
+    def register(self, waiter):
+        """Add a newly created waiter (a dict with waiter_id, name, performance, interest_level)."""
+        with self._lock:
+            if self._scores is None:
+                # Seeding reads the waiter from MongoDB
+                return
+            self._scores[waiter['waiter_id']] = _WaiterScore.from_doc(waiter)
+            self._rebuild()
+
+    def order(self, waiter_id):
+        """A waiter took an order: +1 performance."""
+        self._apply(waiter_id, performance=1, order=True)
+
+    def served(self, waiter_id, delay=None):
+        """A waiter served a table: +1 interest level, and the response delay in seconds if known."""
+        self._apply(waiter_id, interest_level=1, delay=delay)
+
+    def response(self, waiter_id, delay):
+        """Record a response delay without changing the score."""
+        self._apply(waiter_id, delay=delay)
+
+    def penalty(self, waiter_id, performance=1, interest_level=0):
+        """A waiter was late: subtract the given amounts."""
+        self._apply(waiter_id, performance=-performance, interest_level=-interest_level)
+
+    def set_interest(self, waiter_id, interest_level):
+        """
+        Set a waiter's interest level to an absolute value and store it immediately.
+        Returns False if the waiter does not exist.
+        """
+        score = self._lookup(waiter_id)
+        if score is None:
+            return False
+        with self._flush_lock:
+            with self._lock:
+                score.interest_level = interest_level
+                pending = self._pending.get(waiter_id)
+                if pending:
+                    pending['interest_level'] = 0
+                self._rebuild()
+            self.collection.update_one({'waiter_id': waiter_id}, {'$set': {'interest_level': interest_level}})
+        bump('waiters')
+        return True
+
+    def leaderboard(self, k=None):
+        """Return the top k waiters (at most top_k) from the current snapshot."""
+        with self._lock:
+            self._ensure_loaded()
+            if self.clock() - self._snapshot_time > 60:
+                # Let idle windows age out even without new events
+                self._rebuild()
+            snapshot = self._snapshot
+        return snapshot if k is None else snapshot[:k]
+
+    def metrics(self, waiter_id):
+        """Return the live score and rolling metrics of one waiter, or None if unknown."""
+        score = self._lookup(waiter_id)
+        if score is None:
+            return None
+        with self._lock:
+            score.prune(self.clock() - self.window)
+            return score.to_dict(self.window)
+
+    def checkpoint(self):
+        """Write accumulated deltas to MongoDB. Returns the number of waiters updated."""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            operations = [
+                UpdateOne({'waiter_id': waiter_id}, {'$inc': {k: v for k, v in delta.items() if v}})
+                for waiter_id, delta in pending.items() if any(delta.values())
+            ]
+            if not operations:
+                return 0
+            try:
+                self.collection.bulk_write(operations, ordered=False)
+            except Exception:
+                # Put the deltas back so the next checkpoint retries them
+                with self._lock:
+                    for waiter_id, delta in pending.items():
+                        merged = self._pending.setdefault(waiter_id, {'performance': 0, 'interest_level': 0})
+                        for key, value in delta.items():
+                            merged[key] += value
+                raise
+        bump('waiters')
+        return len(operations)
+
+    def _start(self):
+        """Start the checkpoint thread on first use."""
+        if self._thread is not None or self.checkpoint_interval <= 0:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        atexit.register(self.checkpoint)
+
+    def _run(self):
+        while True:
+            time.sleep(self.checkpoint_interval)
+            try:
+                self.checkpoint()
+            except Exception as e:
+                print(f'Waiter score checkpoint failed: {e}')
+
+
+scoreboard = WaiterScoreboard(waiters_collection)
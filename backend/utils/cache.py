@@ -0,0 +1,119 @@
+"""
+Conditional GET and short-TTL response caching for read-heavy endpoints.
+
+Every write route bumps a per-collection version counter. Cached GET
+routes derive their ETag from the versions of the collections they read.
+Within the TTL a matching If-None-Match is answered with 304 and other reads
+are served from memory, without touching MongoDB. After it, the view is
+re-rendered and 304 is only sent if the body is unchanged.
+
+Versions are per process; writes made outside the routes (scripts, other
+workers) are picked up when the TTL expires and the re-rendered body differs.
+"""
+import functools
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from flask import make_response, request
+
+# Seconds a cached body is served without re-querying MongoDB
+RESPONSE_CACHE_TTL = float(os.getenv('RESPONSE_CACHE_TTL', '2'))
+# Maximum number of cached (path, query) entries
+RESPONSE_CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', '256'))
+
+_lock = threading.Lock()
+_versions = {}
+_entries = OrderedDict()
+# Distinguishes ETags issued by different processes/restarts
+_epoch = f'{os.getpid():x}{int(time.time()):x}'
+
+
+def bump(*collections):
+    """
+    Mark collections as changed so dependent cached responses are invalidated.
+    """
+    with _lock:
+        for name in collections:
+            _versions[name] = _versions.get(name, 0) + 1
+
+
+def _current_etag(collections):
+    with _lock:
+        versions = '-'.join(str(_versions.get(name, 0)) for name in collections)
+    return f'{_epoch}-{versions}'
+
+
+def clear():
+    """Drop all cached responses (versions are kept)."""
+    with _lock:
+        _entries.clear()
+
+
+def cached_response(*collections, ttl=None):
+    """
+    Decorator for GET views whose output depends only on `collections`
+    and the request query string.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            max_age = RESPONSE_CACHE_TTL if ttl is None else ttl
+            key = (request.path, tuple(sorted(request.args.items(multi=True))))
+            etag = _current_etag(collections)
+            now = time.monotonic()
+            with _lock:
+                entry = _entries.get(key)
+                if entry is not None:
+                    _entries.move_to_end(key)
+            known = entry is not None and entry['etag'] == etag
+            if known and now - entry['stored_at'] < max_age:
+                if request.if_none_match.contains(etag):
+                    return _not_modified(etag)
+                return _build_response(entry['body'], entry['mimetype'], etag)
+            # Expired or unknown: re-render, since MongoDB may have changed outside the write routes
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200 or response.is_streamed:
+                return response
+            body = response.get_data()
+            digest = hashlib.blake2b(body, digest_size=16).digest()
+            unchanged = known and entry['digest'] == digest
+            if known and not unchanged:
+                # Data changed outside the write routes: issue a new ETag
+                bump(*collections)
+                etag = _current_etag(collections)
+            with _lock:
+                _entries[key] = {
+                    'etag': etag,
+                    'body': body,
+                    'digest': digest,
+                    'mimetype': response.mimetype,
+                    'stored_at': now
+                }
+                _entries.move_to_end(key)
+                while len(_entries) > RESPONSE_CACHE_SIZE:
+                    _entries.popitem(last=False)
+            if unchanged and request.if_none_match.contains(etag):
+                return _not_modified(etag)
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return wrapper
+    return decorator
+
+
+def _build_response(body, mimetype, etag):
+    response = make_response(body)
+    response.mimetype = mimetype
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+def _not_modified(etag):
+    response = make_response('', 304)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
@@ -0,0 +1,47 @@
+"""
+Fast JSON serialization for API responses.
+
+Uses orjson when it is installed and falls back to Flask's stdlib-based
+provider otherwise. Output stays compatible with the default provider:
+keys are sorted, datetimes are still rendered as HTTP dates and dataclasses
+via asdict.
+"""
+import json
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+
+
+def dumps(obj, default=DefaultJSONProvider.default, indent=False, sort_keys=True):
+    """
+    Serialize obj to UTF-8 JSON bytes using the fastest available encoder.
+    """
+    if orjson is not None:
+        options = _ORJSON_OPTIONS | (orjson.OPT_INDENT_2 if indent else 0) | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        try:
+            return orjson.dumps(obj, default=default, option=options)
+        except TypeError:
+            # Non-str dict keys or out-of-range ints: let the stdlib handle them
+            pass
+    separators = None if indent else (',', ':')
+    return json.dumps(obj, default=default, indent=2 if indent else None, separators=separators,
+                      sort_keys=sort_keys).encode('utf-8')
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider that renders jsonify() and dict/list returns with orjson.
+    """
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(dumps(obj, self.default, indent, self.sort_keys) + b'\n', mimetype=self.mimetype)
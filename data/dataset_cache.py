@@ -0,0 +1,284 @@
+"""
+Preprocessed, memory-mapped dataset cache for training the food classifiers.
+
+`build` decodes and resizes every image once (shorter side to --size, then
+center crop, stored as RGB) and packs them into sharded uint8 .npy files with
+a label index. ShardedImageDataset reads those shards through np.load(mmap_mode='r'),
+so samples are zero-copy views into the page cache and epochs no longer
+re-decode JPEGs.
+
+Source layout: one sub-folder per class (data/<kategori>/*.jpg as written by
+veri_toplama.py, or Food-101's images/<class>/*.jpg).
+
+Usage:
+    python data/dataset_cache.py build --src data --out data/cache --size 224
+    python data/dataset_cache.py benchmark --cache data/cache --workers 4
+
+In a notebook under notebooks/:
+    import sys
+    sys.path.insert(0, '../data')
+    from dataset_cache import make_loader, normalize_batch
+    loader = make_loader('../data/cache', batch_size=64, num_workers=4)
+    for images, labels in loader:
+        images = normalize_batch(images)  # uint8 NCHW -> normalized float32
+"""
+import argparse
+import bisect
+import json
+import os
+import random
+import sys
+import time
+from multiprocessing import Pool
+
+import cv2
+import numpy as np
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+INDEX_FILE = 'index.json'
+IMAGENET_MEAN = (0.485, 0.456, 0.406)
+IMAGENET_STD = (0.229, 0.224, 0.225)
+
+
+def scan_classes(src, exclude=()):
+    """Return sorted class names and (path, label) items from class sub-folders."""
+    exclude = {os.path.abspath(path) for path in exclude}
+    classes = []
+    for name in sorted(os.listdir(src)):
+        path = os.path.join(src, name)
+        if os.path.isdir(path) and os.path.abspath(path) not in exclude:
+            if any(f.lower().endswith(IMAGE_EXTENSIONS) for f in os.listdir(path)):
+                classes.append(name)
+    items = []
+    for label, name in enumerate(classes):
+        folder = os.path.join(src, name)
+        for filename in sorted(os.listdir(folder)):
+            if filename.lower().endswith(IMAGE_EXTENSIONS):
+                items.append((os.path.join(folder, filename), label))
+    return classes, items
+
+
+def load_image(args):
+    """Decode one image and return it as a size x size RGB uint8 array, or None."""
+    path, size = args
+    img = cv2.imread(path, cv2.IMREAD_COLOR)
+    if img is None:
+        return None
+    height, width = img.shape[:2]
+    scale = size / min(height, width)
+    resized = cv2.resize(img, (max(size, round(width * scale)), max(size, round(height * scale))),
+                         interpolation=cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR)
+    top = (resized.shape[0] - size) // 2
+    left = (resized.shape[1] - size) // 2
+    crop = resized[top:top + size, left:left + size]
+    return cv2.cvtColor(crop, cv2.COLOR_BGR2RGB)
+
+
+def build_cache(src, out, size=224, shard_size=2048, workers=None, seed=0):
+    """
+    Decode, resize and pack all images under `src` into shards in `out`.
+    Items are shuffled once with `seed` so every shard mixes classes.
+    """
+    os.makedirs(out, exist_ok=True)
+    classes, items = scan_classes(src, exclude=[out])
+    if not items:
+        raise SystemExit(f'No images found in class folders under {src}')
+    random.Random(seed).shuffle(items)
+    shards = []
+    skipped = 0
+    start = time.perf_counter()
+    with Pool(workers) as pool:
+        for shard_index, first in enumerate(range(0, len(items), shard_size)):
+            chunk = items[first:first + shard_size]
+            images_name = f'shard_{shard_index:05d}.npy'
+            images = np.lib.format.open_memmap(os.path.join(out, images_name), mode='w+',
+                                               dtype=np.uint8, shape=(len(chunk), size, size, 3))
+            labels = np.empty(len(chunk), dtype=np.int16)
+            count = 0
+            decoded = pool.imap(load_image, ((path, size) for path, _ in chunk), chunksize=16)
+            for (path, label), img in zip(chunk, decoded):
+                if img is None:
+                    print(f'WARNING: could not read {path}, skipping.')
+                    skipped += 1
+                    continue
+                images[count] = img
+                labels[count] = label
+                count += 1
+            images.flush()
+            del images
+            labels_name = f'labels_{shard_index:05d}.npy'
+            np.save(os.path.join(out, labels_name), labels[:count])
+            shards.append({'images': images_name, 'labels': labels_name, 'count': count})
+            print(f'{images_name}: {count} images')
+    index = {
+        'size': size,
+        'layout': 'NHWC',
+        'color': 'RGB',
+        'classes': classes,
+        'total': sum(shard['count'] for shard in shards),
+        'shards': shards
+    }
+    with open(os.path.join(out, INDEX_FILE), 'w') as f:
+        json.dump(index, f, indent=2)
+    print(f"Cached {index['total']} images ({len(classes)} classes, {skipped} skipped) "
+          f"in {time.perf_counter() - start:.1f}s -> {out}")
+    return index
+
+
+try:
+    import torch
+    from torch.utils.data import DataLoader, Dataset, Sampler
+except ImportError:
+    torch = None
+    Dataset = Sampler = object
+
+
+class ShardedImageDataset(Dataset):
+    """
+    Dataset over a cache built by build_cache().
+    Items are (uint8 HxWx3 RGB view, label). Shards are memory-mapped lazily in
+    each process, so DataLoader workers never pickle image data.
+    """
+    def __init__(self, root, transform=None):
+        with open(os.path.join(root, INDEX_FILE)) as f:
+            self.index = json.load(f)
+        self.root = root
+        self.transform = transform
+        self.classes = self.index['classes']
+        self.shard_counts = [shard['count'] for shard in self.index['shards']]
+        self.offsets = np.cumsum([0] + self.shard_counts).tolist()
+        self._images = None
+        self._labels = None
+
+    def _open(self):
+        self._images = []
+        self._labels = []
+        for shard in self.index['shards']:
+            images = np.load(os.path.join(self.root, shard['images']), mmap_mode='r')
+            self._images.append(images[:shard['count']])
+            self._labels.append(np.load(os.path.join(self.root, shard['labels'])))
+
+    def __len__(self):
+        return self.offsets[-1]
+
+    def locate(self, idx):
+        """Return (shard, position in shard) for a global index."""
+        shard = bisect.bisect_right(self.offsets, idx) - 1
+        return shard, idx - self.offsets[shard]
+
+    def __getitem__(self, idx):
+        if self._images is None:
+            self._open()
+        if idx < 0:
+            idx += len(self)
+        shard, pos = self.locate(idx)
+        img = self._images[shard][pos]
+        label = int(self._labels[shard][pos])
+        if self.transform is not None:
+            img = self.transform(img)
+        return img, label
+
+    def __getstate__(self):
+        # Workers re-open the memory maps instead of receiving copies
+        state = self.__dict__.copy()
+        state['_images'] = None
+        state['_labels'] = None
+        return state
+
+
+class ShardShuffleSampler(Sampler):
+    """
+    Shuffles shard order, then indices within each shard, so reads stay
+    local to one memory-mapped file at a time.
+    """
+    def __init__(self, dataset, seed=0):
+        self.dataset = dataset
+        self.seed = seed
+        self.epoch = 0
+
+    def set_epoch(self, epoch):
+        self.epoch = epoch
+
+    def __len__(self):
+        return len(self.dataset)
+
+    def __iter__(self):
+        rng = random.Random(self.seed + self.epoch)
+        shards = list(range(len(self.dataset.shard_counts)))
+        rng.shuffle(shards)
+        for shard in shards:
+            indices = list(range(self.dataset.offsets[shard], self.dataset.offsets[shard + 1]))
+            rng.shuffle(indices)
+            yield from indices
+
+
+def collate_uint8(batch):
+    """Stack (HxWx3 uint8, label) samples into a uint8 NCHW tensor and a label tensor."""
+    images = np.stack([img for img, _ in batch])
+    labels = torch.tensor([label for _, label in batch], dtype=torch.long)
+    return torch.from_numpy(images).permute(0, 3, 1, 2), labels
+
+
+def normalize_batch(images, mean=IMAGENET_MEAN, std=IMAGENET_STD):
+    """Convert a uint8 NCHW batch to normalized float32, once per batch in the training process."""
+    mean = torch.tensor(mean, dtype=torch.float32, device=images.device).view(1, 3, 1, 1) * 255
+    std = torch.tensor(std, dtype=torch.float32, device=images.device).view(1, 3, 1, 1) * 255
+    return images.float().sub_(mean).div_(std)
+
+
+def make_loader(root, batch_size=64, shuffle=True, num_workers=4, prefetch_factor=4, seed=0, pin_memory=False):
+    """
+    DataLoader over a cache. Batches stay uint8 across the worker boundary
+    (4x less data than float32); call normalize_batch() in the training loop.
+    """
+    if torch is None:
+        raise RuntimeError('torch is required for the DataLoader')
+    dataset = ShardedImageDataset(root)
+    sampler = ShardShuffleSampler(dataset, seed=seed) if shuffle else None
+    kwargs = {}
+    if num_workers > 0:
+        kwargs.update(prefetch_factor=prefetch_factor, persistent_workers=True)
+    return DataLoader(dataset, batch_size=batch_size, sampler=sampler, num_workers=num_workers,
+                      collate_fn=collate_uint8, pin_memory=pin_memory, **kwargs)
+
+
+def benchmark(cache, batch_size, workers, epochs):
+    """Iterate the loader and report images/sec per epoch."""
+    loader = make_loader(cache, batch_size=batch_size, num_workers=workers)
+    for epoch in range(epochs):
+        if loader.sampler is not None:
+            loader.sampler.set_epoch(epoch)
+        start = time.perf_counter()
+        seen = 0
+        for images, _ in loader:
+            normalize_batch(images)
+            seen += images.shape[0]
+        elapsed = time.perf_counter() - start
+        print(f'epoch {epoch}: {seen} images in {elapsed:.2f}s ({seen / elapsed:.0f} images/sec)')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build and read the preprocessed dataset cache')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build = subparsers.add_parser('build', help='decode, resize and pack images into shards')
+    build.add_argument('--src', default='data', help='folder with one sub-folder per class')
+    build.add_argument('--out', default=os.path.join('data', 'cache'))
+    build.add_argument('--size', type=int, default=224)
+    build.add_argument('--shard-size', type=int, default=2048, help='images per shard')
+    build.add_argument('--workers', type=int, default=None, help='decode processes (default: all CPUs)')
+    build.add_argument('--seed', type=int, default=0)
+    bench = subparsers.add_parser('benchmark', help='time full passes over the cache')
+    bench.add_argument('--cache', default=os.path.join('data', 'cache'))
+    bench.add_argument('--batch-size', type=int, default=64)
+    bench.add_argument('--workers', type=int, default=4)
+    bench.add_argument('--epochs', type=int, default=2)
+    args = parser.parse_args(argv)
+    if args.command == 'build':
+        build_cache(args.src, args.out, args.size, args.shard_size, args.workers, args.seed)
+    else:
+        benchmark(args.cache, args.batch_size, args.workers, args.epochs)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())